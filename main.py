@@ -2,33 +2,73 @@
 douyin-processor 主入口
 """
 
+import asyncio
+import sys
+
 import uvicorn
+from fastapi import FastAPI
+from loguru import logger
 
-from src.utils import setup_logger, load_config
+from src.utils import setup_logger, load_config, freeze_config
 
 # 加载配置
-config = load_config("config/app.yaml")
+config = freeze_config(load_config("config/app.yaml"))
 
 # 设置日志
-log_config = config.get("app", {}).get("logging", {})
+log_config = config["app"]["logging"]
 setup_logger(
     log_dir=log_config.get("dir", "logs"),
-    level=log_config.get("level", "INFO")
+    level=log_config.get("level", "INFO"),
+    rotation=log_config.get("rotation", "100 MB"),
+    retention=log_config.get("retention", "7 days")
 )
 
+
+async def serve(server: uvicorn.Server, app: FastAPI):
+    """运行服务，视频处理器初始化失败时停止服务
+
+    Args:
+        server: uvicorn 服务
+        app: FastAPI 应用
+    """
+    serve_task = asyncio.create_task(server.serve())
+
+    # 服务启动后（lifespan 已创建初始化任务）等待处理器初始化结束
+    while not server.started and not serve_task.done():
+        await asyncio.sleep(0.1)
+
+    if server.started:
+        await asyncio.wait(
+            {app.state.init_task, serve_task},
+            return_when=asyncio.FIRST_COMPLETED
+        )
+        if app.state.init_error is not None:
+            logger.error("视频处理器初始化失败，停止服务")
+            server.should_exit = True
+
+    await serve_task
+
+
 if __name__ == "__main__":
-    from loguru import logger
+    from src.server.main import app
 
-    server_config = config.get("app", {}).get("server", {})
+    server_config = config["app"]["server"]
     host = server_config.get("host", "0.0.0.0")
     port = server_config.get("port", 8093)
 
     logger.info(f"启动 douyin-processor 服务: http://{host}:{port}")
 
-    uvicorn.run(
-        "src.server.main:app",
+    # 访问日志每个请求都要格式化并输出一行，高并发下明显降低吞吐，默认关闭
+    server = uvicorn.Server(uvicorn.Config(
+        app,
         host=host,
         port=port,
-        log_level="info",
+        log_level=server_config.get("log_level", "info"),
+        access_log=server_config.get("access_log", False),
         reload=False
-    )
+    ))
+    asyncio.run(serve(server, app))
+
+    # 初始化失败时以非零状态退出，由容器重启策略重新拉起
+    if getattr(app.state, "init_error", None) is not None:
+        sys.exit(1)
@@ -8,7 +8,7 @@ from typing import Optional
 from datetime import datetime
 
 
-@dataclass
+@dataclass(slots=True)
 class VideoInfo:
     """视频信息"""
     aweme_id: str              # 视频ID
@@ -21,7 +21,7 @@ class VideoInfo:
     is_product: bool = False   # 是否为商品视频
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class TranscriptSegment:
     """转写文本片段"""
     start_time: float          # 开始时间（秒）
@@ -30,7 +30,7 @@ class TranscriptSegment:
     confidence: float = 0.0    # 置信度（0-1）
 
 
-@dataclass
+@dataclass(slots=True)
 class TranscriptResult:
     """转写结果"""
     text: str                  # 完整文本
@@ -39,7 +39,7 @@ class TranscriptResult:
     audio_duration: float = 0.0  # 音频时长（秒）
 
 
-@dataclass
+@dataclass(slots=True)
 class ProcessStatus:
     """处理状态"""
     aweme_id: str
@@ -49,7 +49,7 @@ class ProcessStatus:
     error: str = ""            # 错误信息
 
 
-@dataclass
+@dataclass(slots=True)
 class VideoFile:
     """视频文件信息"""
     aweme_id: str
@@ -58,7 +58,7 @@ class VideoFile:
     url: str = ""
 
 
-@dataclass
+@dataclass(slots=True)
 class ProcessResult:
     """处理结果"""
     aweme_id: str
@@ -69,7 +69,7 @@ class ProcessResult:
     process_time: float = 0.0
 
 
-@dataclass
+@dataclass(slots=True)
 class VideoMetadata:
     """视频元数据（来自 file-system-go）"""
     filename: str               # 文件名（如 7609169800750206794.wav）
@@ -1 +1,8 @@
 """视频处理模块"""
+
+from types import MappingProxyType
+from typing import Mapping
+
+# 只查询 .wav 文件的过滤条件（只读，各处共用）
+# 定义在包级别，接口模块引用时无需导入 HTTP 客户端等依赖
+WAV_FILTER: Mapping[str, str] = MappingProxyType({"suffix": ".wav"})
@@ -0,0 +1,111 @@
+"""
+结果文件异步写入器
+由单个后台任务批量写入 JSON 文件，避免磁盘 I/O 阻塞事件循环
+"""
+
+import asyncio
+from pathlib import Path
+from typing import Optional
+from loguru import logger
+
+from src.utils import save_json
+
+
+class AsyncArtifactWriter:
+    """结果文件异步写入器
+
+    写入请求进入队列后由后台任务取出，每次最多取 batch_size 个，
+    在同一个线程调用中依次写完，减少线程切换次数。
+    """
+
+    def __init__(self, batch_size: int = 64):
+        """初始化写入器
+
+        Args:
+            batch_size: 每批最多写入的文件数量
+        """
+        self.batch_size = max(1, batch_size)
+
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._writer_task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    async def write(self, output_file: Path, data: dict):
+        """提交写入请求，等待文件写完
+
+        Args:
+            output_file: 输出文件路径
+            data: 要写入的数据
+
+        Raises:
+            RuntimeError: 写入器已关闭
+            Exception: 写入失败时抛出写入过程中的异常
+        """
+        if self._closed:
+            raise RuntimeError(f"写入器已关闭，无法写入: {output_file}")
+
+        if self._writer_task is None or self._writer_task.done():
+            self._writer_task = asyncio.create_task(self._writer_loop())
+
+        done = asyncio.get_running_loop().create_future()
+        await self._queue.put((output_file, data, done))
+        await done
+
+    async def flush(self):
+        """等待队列中已提交的写入全部完成"""
+        if self._writer_task is not None:
+            await self._queue.join()
+
+    async def close(self):
+        """写完剩余文件并停止后台任务，之后不再接受写入"""
+        self._closed = True
+        if self._writer_task is None:
+            return
+
+        await self._queue.join()
+        self._writer_task.cancel()
+        try:
+            await self._writer_task
+        except asyncio.CancelledError:
+            pass
+        self._writer_task = None
+
+    async def _writer_loop(self):
+        """后台批量写入结果文件"""
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            try:
+                errors = await asyncio.to_thread(self._write_batch, batch)
+                for (_, _, done), error in zip(batch, errors):
+                    if done.done():
+                        continue
+                    if error is None:
+                        done.set_result(None)
+                    else:
+                        done.set_exception(error)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    @staticmethod
+    def _write_batch(batch: list) -> list[Optional[Exception]]:
+        """写入一批文件（在线程中执行）
+
+        Args:
+            batch: (输出文件, 数据, future) 列表
+
+        Returns:
+            每个文件的写入异常，成功为 None
+        """
+        errors = []
+        for output_file, data, _ in batch:
+            try:
+                save_json(data, str(output_file))
+                errors.append(None)
+            except Exception as e:
+                logger.error(f"写入结果文件失败: {output_file} - {e}")
+                errors.append(e)
+        return errors
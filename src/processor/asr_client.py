@@ -4,112 +4,226 @@ ASR客户端
 """
 
 import asyncio
-from pathlib import Path
+import random
+import time
 from typing import Optional
 from loguru import logger
 import httpx
+import orjson
 
 from src.models import TranscriptResult, TranscriptSegment
 
+# 限流或服务端暂时不可用时需要重试的 HTTP 状态码（查询任务等幂等请求）
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+RETRY_ERRORS = (httpx.TransportError,)
+
+# 提交任务不是幂等请求：服务端可能已受理任务，只在确定未受理时重试，
+# 避免重复创建（并计费）识别任务
+SUBMIT_RETRY_STATUS_CODES = frozenset({429})
+SUBMIT_RETRY_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout)
+
 
 class AliyunASRClient:
     """阿里云百炼平台 ASR 客户端"""
 
-    def __init__(self, api_key: str, model: str = "fun-asr"):
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "fun-asr",
+        max_rps: float = 10.0,
+        timeout: float = 30.0,
+        task_timeout: float = 300,
+        file_timeout: float = 30
+    ):
         """初始化ASR客户端
 
         Args:
             api_key: 百炼平台 API Key
             model: 模型名称
+            max_rps: 每秒最多调用百炼 API 的次数（提交与查询合计），0 表示不限制
+            timeout: 单次 HTTP 请求的超时时间（秒）
+            task_timeout: 单个文件的识别任务最长等待时间（秒）
+            file_timeout: 批量任务中每增加一个文件增加的等待时间（秒）
         """
         self.api_key = api_key
         self.model = model
+        self.max_rps = max_rps
+        self.task_timeout = task_timeout
+        self.file_timeout = file_timeout
+
+        # 请求限速（并发处理时避免触发平台 QPS 限制）
+        self._rate_lock = asyncio.Lock()
+        self._next_request_time = 0.0
 
         # API 端点
         self.submit_url = "https://dashscope.aliyuncs.com/api/v1/services/audio/asr/transcription"
         self.query_url_template = "https://dashscope.aliyuncs.com/api/v1/tasks/{}"
 
+        # 共享 HTTP 客户端，复用连接（轮询时避免每次重新握手）
+        self._client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=100,
+                max_keepalive_connections=32,
+                keepalive_expiry=60.0
+            )
+        )
+
         # 验证配置
         if not self.api_key:
             logger.warning("百炼平台 API Key 未配置，ASR 功能将不可用")
 
         logger.info("阿里云百炼平台 ASR 客户端初始化完成")
 
-    async def transcribe_file(
+    async def aclose(self):
+        """关闭 HTTP 客户端"""
+        await self._client.aclose()
+
+    async def _throttle(self):
+        """按 max_rps 限制 API 调用速率，必要时等待"""
+        if self.max_rps <= 0:
+            return
+
+        async with self._rate_lock:
+            now = time.monotonic()
+            wait = self._next_request_time - now
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._next_request_time = max(now, self._next_request_time) + 1.0 / self.max_rps
+
+    async def _post(
         self,
-        audio_file: str,
-        file_url: str,
-        format: str = "wav"
-    ) -> Optional[TranscriptResult]:
-        """识别音频文件
+        url: str,
+        headers: dict,
+        json: Optional[dict] = None,
+        max_attempts: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        retry_status_codes: frozenset = RETRY_STATUS_CODES,
+        retry_errors: tuple = RETRY_ERRORS
+    ) -> httpx.Response:
+        """调用百炼 API，遇到限流或暂时性错误时按指数退避重试
 
         Args:
-            audio_file: 音频文件路径（可选，仅用于日志）
-            file_url: 音频文件的公网 URL
-            format: 音频格式
+            url: 请求 URL
+            headers: 请求头
+            json: 请求体
+            max_attempts: 最多尝试次数
+            base_delay: 首次重试等待时间（秒）
+            max_delay: 重试等待时间上限（秒）
+            retry_status_codes: 需要重试的 HTTP 状态码
+            retry_errors: 需要重试的网络异常类型
 
         Returns:
-            转写结果对象，失败返回 None
+            最后一次请求的响应
+
+        Raises:
+            httpx.TransportError: 发生不可重试的网络错误，或最后一次请求仍发生网络错误
         """
-        logger.info(f"开始识别音频: {file_url}")
+        for attempt in range(max_attempts):
+            await self._throttle()
+            try:
+                response = await self._client.post(url, headers=headers, json=json)
+            except retry_errors as e:
+                if attempt == max_attempts - 1:
+                    raise
+                logger.warning(f"请求百炼 API 异常，准备重试: {e}")
+            else:
+                if (response.status_code not in retry_status_codes
+                        or attempt == max_attempts - 1):
+                    return response
+                logger.warning(f"请求百炼 API 失败: HTTP {response.status_code}，准备重试")
+
+            # 指数退避并加入随机抖动，避免并发请求同时重试
+            delay = min(max_delay, base_delay * 2 ** attempt)
+            await asyncio.sleep(delay + random.uniform(0, 0.25))
 
-        # 如果传入了本地文件路径，检查是否存在（可选）
-        if audio_file:
-            audio_path = Path(audio_file)
-            if not audio_path.exists():
-                logger.warning(f"本地音频文件不存在: {audio_file}，但将继续使用 URL 进行识别")
+    async def transcribe_batch(
+        self,
+        file_urls: list[str]
+    ) -> list[Optional[TranscriptResult]]:
+        """批量识别音频文件（一个任务提交多个文件）
+
+        Args:
+            file_urls: 音频文件的公网 URL 列表
+
+        Returns:
+            转写结果列表，与 file_urls 顺序一致，单个文件失败对应位置为 None
+        """
+        if not file_urls:
+            return []
+
+        logger.info(f"开始批量识别音频: {len(file_urls)} 个")
+
+        failed = [None] * len(file_urls)
 
         try:
             # 提交 ASR 任务
-            task_id = await self._submit_task([file_url])
+            task_id = await self._submit_task(file_urls)
 
             if not task_id:
                 logger.error("提交 ASR 任务失败")
-                return None
+                return failed
 
-            logger.info(f"ASR 任务已提交，任务 ID: {task_id}")
+            logger.info(f"ASR 批量任务已提交，任务 ID: {task_id}")
 
-            # 轮询查询结果
-            result = await self._wait_for_result(task_id)
+            # 轮询查询结果（等待时间随文件数量增加，避免个别慢文件拖累整批超时）
+            max_wait = self.task_timeout + self.file_timeout * (len(file_urls) - 1)
+            result = await self._wait_for_result(task_id, max_wait=max_wait)
 
-            if result:
-                logger.info(f"识别任务完成: {task_id}")
-                return self._parse_response(result)
-            else:
-                logger.error(f"识别任务失败或超时: {task_id}")
-                return None
+            if not result:
+                logger.error(f"批量识别任务失败或超时: {task_id}")
+                return failed
+
+            logger.info(f"批量识别任务完成: {task_id}")
+            return await self._parse_batch_response(result, file_urls)
 
         except Exception as e:
-            logger.error(f"音频识别失败: {e}")
-            return None
+            logger.error(f"批量音频识别失败: {e}")
+            return failed
 
-    def _parse_response(
+    async def _parse_batch_response(
         self,
-        response: dict
-    ) -> TranscriptResult:
-        """解析API响应
+        response: dict,
+        file_urls: list[str]
+    ) -> list[Optional[TranscriptResult]]:
+        """解析批量任务的API响应
 
         Args:
             response: API返回的原始数据
+            file_urls: 提交的文件 URL 列表
 
         Returns:
-            标准化的转写结果
+            转写结果列表，与 file_urls 顺序一致
         """
-        # 百炼平台 ASR 的响应格式
-        results = response.get("results", [])
+        # 每个文件对应一个子任务结果，按 file_url 对应回提交顺序
+        results_by_url = {
+            item.get("file_url"): item
+            for item in response.get("results", [])
+        }
 
-        if not results:
-            logger.warning("识别结果为空")
-            return TranscriptResult(
-                text="",
-                segments=[],
-                confidence=0.0,
-                audio_duration=0.0
-            )
+        async def _parse(file_url: str) -> Optional[TranscriptResult]:
+            item = results_by_url.get(file_url)
+
+            if not item or item.get("subtask_status", "SUCCEEDED") != "SUCCEEDED":
+                logger.error(f"子任务识别失败: {file_url}, {item}")
+                return None
+
+            return await self._parse_result_item(item)
+
+        # 并发下载各文件的转写结果
+        return list(await asyncio.gather(*[_parse(url) for url in file_urls]))
 
-        # 获取第一个结果（通常只提交一个文件）
-        first_result = results[0]
-        transcription_url = first_result.get("transcription_url", "")
+    async def _parse_result_item(self, item: dict) -> TranscriptResult:
+        """解析单个文件的识别结果
+
+        Args:
+            item: API 响应 results 中的一项
+
+        Returns:
+            标准化的转写结果
+        """
+        transcription_url = item.get("transcription_url", "")
 
         if not transcription_url:
             logger.warning("未获取到转写结果 URL")
@@ -122,7 +236,7 @@ class AliyunASRClient:
 
         # 下载转写结果
         try:
-            result_data = self._fetch_transcription_result(transcription_url)
+            result_data = await self._fetch_transcription_result(transcription_url)
             return self._parse_transcription_data(result_data)
         except Exception as e:
             logger.error(f"解析转写结果失败: {e}")
@@ -133,7 +247,7 @@ class AliyunASRClient:
                 audio_duration=0.0
             )
 
-    def _fetch_transcription_result(self, url: str) -> dict:
+    async def _fetch_transcription_result(self, url: str) -> dict:
         """获取转写结果
 
         Args:
@@ -142,10 +256,9 @@ class AliyunASRClient:
         Returns:
             转写结果数据
         """
-        # 使用同步 HTTP 请求获取结果
-        response = httpx.get(url, timeout=30.0)
+        response = await self._client.get(url)
         response.raise_for_status()
-        return response.json()
+        return orjson.loads(response.content)
 
     def _parse_transcription_data(self, data: dict) -> TranscriptResult:
         """解析转写数据
@@ -173,19 +286,23 @@ class AliyunASRClient:
         # 构建完整文本
         full_text = first_transcript.get("text", "")
 
-        # 构建分段信息
+        # 构建分段信息（单次遍历，同时累计整体置信度）
         segments = []
+        append_segment = segments.append
+        total_confidence = 0.0
+
         for sentence in sentences:
-            words = sentence.get("words", [])
+            words = sentence.get("words")
             # 计算平均置信度
             confidence = 0.0
             if words:
-                confidence = sum(
+                confidence = sum([
                     w.get("punctuation_probability", 0.5)
                     for w in words
-                ) / len(words)
+                ]) / len(words)
+            total_confidence += confidence
 
-            segments.append(TranscriptSegment(
+            append_segment(TranscriptSegment(
                 start_time=sentence.get("begin_time", 0) / 1000.0,  # 转换为秒
                 end_time=sentence.get("end_time", 0) / 1000.0,      # 转换为秒
                 text=sentence.get("text", ""),
@@ -197,9 +314,7 @@ class AliyunASRClient:
         audio_duration = properties.get("original_duration_in_milliseconds", 0) / 1000.0
 
         # 计算整体置信度
-        confidence = 0.0
-        if segments:
-            confidence = sum(seg.confidence for seg in segments) / len(segments)
+        confidence = total_confidence / len(segments) if segments else 0.0
 
         return TranscriptResult(
             text=full_text,
@@ -234,28 +349,29 @@ class AliyunASRClient:
         }
 
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    self.submit_url,
-                    headers=headers,
-                    json=data
-                )
+            response = await self._post(
+                self.submit_url,
+                headers=headers,
+                json=data,
+                retry_status_codes=SUBMIT_RETRY_STATUS_CODES,
+                retry_errors=SUBMIT_RETRY_ERRORS
+            )
 
-                if response.status_code == 200:
-                    result = response.json()
-                    task_id = result.get("output", {}).get("task_id")
+            if response.status_code == 200:
+                result = orjson.loads(response.content)
+                task_id = result.get("output", {}).get("task_id")
 
-                    if task_id:
-                        return task_id
-                    else:
-                        logger.error(f"提交任务失败: {result}")
-                        return None
+                if task_id:
+                    return task_id
                 else:
-                    logger.error(
-                        f"提交任务失败: HTTP {response.status_code}, "
-                        f"{response.text}"
-                    )
+                    logger.error(f"提交任务失败: {result}")
                     return None
+            else:
+                logger.error(
+                    f"提交任务失败: HTTP {response.status_code}, "
+                    f"{response.text}"
+                )
+                return None
 
         except Exception as e:
             logger.error(f"提交任务异常: {e}")
@@ -264,15 +380,22 @@ class AliyunASRClient:
     async def _wait_for_result(
         self,
         task_id: str,
-        max_wait: int = 300,
-        interval: int = 2
+        max_wait: float = 300,
+        interval: float = 1.0,
+        max_interval: float = 15.0,
+        backoff: float = 1.5
     ) -> Optional[dict]:
         """等待任务完成
 
+        查询间隔按指数退避增长，识别任务通常需要数秒以上，
+        避免在任务完成前频繁轮询。
+
         Args:
             task_id: 任务 ID
             max_wait: 最大等待时间（秒）
-            interval: 查询间隔（秒）
+            interval: 首次查询间隔（秒）
+            max_interval: 查询间隔上限（秒）
+            backoff: 每次查询后间隔的增长倍数
 
         Returns:
             任务结果，失败或超时返回 None
@@ -284,34 +407,36 @@ class AliyunASRClient:
             "Content-Type": "application/json"
         }
 
-        wait_time = 0
+        wait_time = 0.0
 
         while wait_time < max_wait:
-            await asyncio.sleep(interval)
-            wait_time += interval
+            # 不超过剩余等待时间
+            delay = min(interval, max_wait - wait_time)
+            await asyncio.sleep(delay)
+            wait_time += delay
+            interval = min(interval * backoff, max_interval)
 
             try:
-                async with httpx.AsyncClient(timeout=30.0) as client:
-                    response = await client.post(
-                        query_url,
-                        headers=headers
-                    )
-
-                    if response.status_code == 200:
-                        result = response.json()
-                        output = result.get("output", {})
-                        task_status = output.get("task_status")
-
-                        if task_status == "SUCCEEDED":
-                            return output
-                        elif task_status == "FAILED":
-                            logger.error(f"任务失败: {output}")
-                            return None
-                        else:
-                            logger.debug(f"任务状态: {task_status}, 已等待 {wait_time} 秒")
-                    else:
-                        logger.error(f"查询任务失败: HTTP {response.status_code}")
+                response = await self._post(
+                    query_url,
+                    headers=headers
+                )
+
+                if response.status_code == 200:
+                    result = orjson.loads(response.content)
+                    output = result.get("output", {})
+                    task_status = output.get("task_status")
+
+                    if task_status == "SUCCEEDED":
+                        return output
+                    elif task_status == "FAILED":
+                        logger.error(f"任务失败: {output}")
                         return None
+                    else:
+                        logger.debug(f"任务状态: {task_status}, 已等待 {wait_time:.1f} 秒")
+                else:
+                    logger.error(f"查询任务失败: HTTP {response.status_code}")
+                    return None
 
             except Exception as e:
                 logger.error(f"查询任务异常: {e}")
@@ -6,12 +6,16 @@ file-system-go 客户端
 import asyncio
 import time
 from pathlib import Path
-from typing import Optional, List
+from typing import AsyncIterator, Mapping, Optional, List
 from loguru import logger
 import httpx
+import orjson
 
 from src.models import VideoFile, VideoMetadata
 
+# 下载时每次读取的块大小（1 MB）
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+
 
 class FileSystemClient:
     """file-system-go 客户端"""
@@ -22,7 +26,12 @@ class FileSystemClient:
         query_endpoint: str = "/api/videos/query",
         download_endpoint_template: str = "/api/videos/{id}/download",
         timeout: int = 300,
-        cache_ttl: int = 30
+        connect_timeout: float = 2.0,
+        query_timeout: float = 30.0,
+        metadata_timeout: float = 10.0,
+        cache_ttl: int = 30,
+        metadata_cache_ttl: int = 60,
+        metadata_cache_size: int = 10000
     ):
         """初始化客户端
 
@@ -31,23 +40,53 @@ class FileSystemClient:
             query_endpoint: 查询接口路径
             download_endpoint_template: 下载接口路径模板
             timeout: 请求超时时间（秒）
+            connect_timeout: 建立连接的超时时间（秒），连接失败时尽快返回
+            query_timeout: 查询、删除、标记已读请求的超时时间（秒）
+            metadata_timeout: 元数据请求的超时时间（秒）
             cache_ttl: 缓存有效期（秒），默认 30 秒
+            metadata_cache_ttl: 元数据缓存有效期（秒），默认 60 秒
+            metadata_cache_size: 元数据缓存最多保存的条目数
         """
         self.base_url = base_url.rstrip("/")
         self.query_url = f"{base_url}{query_endpoint}"
         self.download_endpoint_template = download_endpoint_template
         self.timeout = timeout
+        self.connect_timeout = connect_timeout
         self.cache_ttl = cache_ttl
+        self.metadata_cache_ttl = metadata_cache_ttl
+        self.metadata_cache_size = metadata_cache_size
+
+        # 各类请求的超时时间：建立连接统一使用较短的超时
+        self._query_timeout = httpx.Timeout(query_timeout, connect=connect_timeout)
+        self._metadata_timeout = httpx.Timeout(metadata_timeout, connect=connect_timeout)
+
+        # 共享 HTTP 客户端，复用连接（保活连接数覆盖元数据并发请求）
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            limits=httpx.Limits(
+                max_connections=200,
+                max_keepalive_connections=100,
+                keepalive_expiry=60.0
+            )
+        )
 
         # 视频列表缓存
         self._video_list_cache: Optional[List[VideoFile]] = None
         self._video_list_cache_time: float = 0
+        self._video_index: dict[str, VideoFile] = {}
+
+        # 视频元数据缓存：aweme_id -> (缓存时间, 元数据)，元数据不存在时缓存 None
+        self._metadata_cache: dict[str, tuple[float, Optional[VideoMetadata]]] = {}
 
         logger.info(f"file-system-go 客户端初始化完成: {base_url}")
 
+    async def aclose(self):
+        """关闭 HTTP 客户端"""
+        await self._client.aclose()
+
     async def get_video_list(
         self,
-        filters: dict = None,
+        filters: Mapping = None,
         use_cache: bool = True
     ) -> List[VideoFile]:
         """获取视频列表
@@ -56,74 +95,159 @@ class FileSystemClient:
             filters: 过滤条件，如 {"prefix": "audio", "suffix": ".mp4"}
             use_cache: 是否使用缓存，默认 True
 
+        Returns:
+            视频文件列表
+        """
+        return (await self._load_video_list(filters, use_cache)).copy()
+
+    async def count_videos(
+        self,
+        filters: Mapping = None,
+        use_cache: bool = True
+    ) -> int:
+        """获取视频数量（不复制视频列表）
+
+        Args:
+            filters: 过滤条件
+            use_cache: 是否使用缓存，默认 True
+
+        Returns:
+            视频数量
+        """
+        return len(await self._load_video_list(filters, use_cache))
+
+    async def iter_videos(
+        self,
+        filters: Mapping = None,
+        chunk_size: int = 200,
+        use_cache: bool = True
+    ) -> AsyncIterator[VideoFile]:
+        """逐个遍历视频（不复制视频列表）
+
+        每遍历 chunk_size 个视频让出一次事件循环，避免大列表长时间占用。
+
+        Args:
+            filters: 过滤条件
+            chunk_size: 每次让出事件循环前遍历的视频数量
+            use_cache: 是否使用缓存，默认 True
+
+        Yields:
+            视频文件信息
+        """
+        videos = await self._load_video_list(filters, use_cache)
+        for i, video in enumerate(videos, 1):
+            yield video
+            if i % chunk_size == 0:
+                await asyncio.sleep(0)
+
+    async def _load_video_list(
+        self,
+        filters: Mapping = None,
+        use_cache: bool = True
+    ) -> List[VideoFile]:
+        """获取视频列表，命中缓存时直接返回缓存的列表（调用方不得修改）
+
+        Args:
+            filters: 过滤条件
+            use_cache: 是否使用缓存
+
         Returns:
             视频文件列表
         """
         # 检查缓存是否有效
         current_time = time.time()
-        if (use_cache and
-            self._video_list_cache is not None and
-            current_time - self._video_list_cache_time < self.cache_ttl):
+        if use_cache and self._is_video_list_cache_valid(current_time):
             logger.info(f"返回缓存的视频列表（{len(self._video_list_cache)} 个）")
-            return self._video_list_cache.copy()
+            return self._video_list_cache
 
         logger.info("获取视频列表")
 
         # 构建请求体，符合 file-system-go 的格式
         request_body = {}
         if filters:
-            request_body["filters"] = filters
+            request_body["filters"] = dict(filters)
 
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    self.query_url,
-                    json=request_body
-                )
-
-                if response.status_code == 200:
-                    data = response.json()
-
-                    # 检查 success 字段
-                    if not data.get("success", False):
-                        logger.error(f"获取视频列表失败: {data.get('error', 'Unknown error')}")
-                        return []
+            response = await self._client.post(
+                self.query_url,
+                json=request_body,
+                timeout=self._query_timeout
+            )
+
+            if response.status_code == 200:
+                data = orjson.loads(response.content)
+
+                # 检查 success 字段
+                if not data.get("success", False):
+                    logger.error(f"获取视频列表失败: {data.get('error', 'Unknown error')}")
+                    return []
 
-                    videos = []
+                videos = []
+
+                for item in data.get("videos", []):
+                    # 从文件名提取 aweme_id（格式为 xxx.wav）
+                    filename = item.get("filename", "")
+                    aweme_id = filename.replace(".wav", "")
+
+                    # 获取 URL，如果是相对路径则拼接 base_url
+                    url = item.get("url", "")
+                    if url and not url.startswith("http"):
+                        url = f"{self.base_url}{url}"
+
+                    videos.append(VideoFile(
+                        aweme_id=aweme_id,
+                        filename=filename,
+                        size=item.get("size", 0),
+                        url=url
+                    ))
+
+                # 更新缓存
+                self._video_list_cache = videos
+                self._video_list_cache_time = current_time
+                self._video_index = {video.aweme_id: video for video in videos}
+
+                logger.info(f"获取到 {len(videos)} 个视频")
+                return videos
+            else:
+                logger.error(
+                    f"获取视频列表失败: HTTP {response.status_code}, "
+                    f"{response.text}"
+                )
+                return []
 
-                    for item in data.get("videos", []):
-                        # 从文件名提取 aweme_id（格式为 xxx.wav）
-                        filename = item.get("filename", "")
-                        aweme_id = filename.replace(".wav", "")
+        except Exception as e:
+            logger.error(f"获取视频列表异常: {e}")
+            return []
 
-                        # 获取 URL，如果是相对路径则拼接 base_url
-                        url = item.get("url", "")
-                        if url and not url.startswith("http"):
-                            url = f"{self.base_url}{url}"
+    async def get_video(
+        self,
+        aweme_id: str,
+        filters: Mapping = None,
+        use_cache: bool = True
+    ) -> Optional[VideoFile]:
+        """按 ID 获取单个视频信息
 
-                        videos.append(VideoFile(
-                            aweme_id=aweme_id,
-                            filename=filename,
-                            size=item.get("size", 0),
-                            url=url
-                        ))
+        Args:
+            aweme_id: 视频 ID
+            filters: 过滤条件，缓存失效时用于重新获取列表
+            use_cache: 是否使用缓存，默认 True
 
-                    # 更新缓存
-                    self._video_list_cache = videos
-                    self._video_list_cache_time = current_time
+        Returns:
+            视频文件信息，不存在返回 None
+        """
+        if not (use_cache and self._is_video_list_cache_valid(time.time())):
+            videos = await self._load_video_list(filters=filters, use_cache=use_cache)
+            if not videos:
+                return None
 
-                    logger.info(f"获取到 {len(videos)} 个视频")
-                    return videos
-                else:
-                    logger.error(
-                        f"获取视频列表失败: HTTP {response.status_code}, "
-                        f"{response.text}"
-                    )
-                    return []
+        return self._video_index.get(aweme_id)
 
-        except Exception as e:
-            logger.error(f"获取视频列表异常: {e}")
-            return []
+    def _is_video_list_cache_valid(self, current_time: float) -> bool:
+        """检查视频列表缓存是否有效"""
+        return (
+            self._video_list_cache is not None and
+            current_time - self._video_list_cache_time < self.cache_ttl
+        )
 
     async def download_video(
         self,
@@ -148,31 +272,42 @@ class FileSystemClient:
         # 确保输出目录存在
         output_path.parent.mkdir(parents=True, exist_ok=True)
 
+        f = None
+        completed = False
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(download_url)
-
-                if response.status_code == 200:
-                    # 保存文件
-                    with open(output_path, "wb") as f:
-                        f.write(response.content)
-
-                    file_size = output_path.stat().st_size
-                    logger.info(
-                        f"视频下载成功: {output_path} "
-                        f"({file_size / 1024 / 1024:.2f} MB)"
-                    )
-                    return str(output_path)
-                else:
+            # 流式写入磁盘，避免整个文件驻留内存
+            async with self._client.stream("GET", download_url) as response:
+                if response.status_code != 200:
+                    await response.aread()
                     logger.error(
                         f"视频下载失败: HTTP {response.status_code}, "
                         f"{response.text}"
                     )
                     return None
 
+                # 打开、写入、关闭文件都放到线程中，不阻塞事件循环
+                f = await asyncio.to_thread(open, output_path, "wb")
+                async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                    await asyncio.to_thread(f.write, chunk)
+                await asyncio.to_thread(f.close)
+                completed = True
+
+            file_size = output_path.stat().st_size
+            logger.info(
+                f"视频下载成功: {output_path} "
+                f"({file_size / 1024 / 1024:.2f} MB)"
+            )
+            return str(output_path)
+
         except Exception as e:
             logger.error(f"视频下载异常: {e}")
-            return []
+            return None
+
+        finally:
+            # 下载失败或被取消时清理未写完的文件
+            if f is not None and not completed:
+                f.close()
+                output_path.unlink(missing_ok=True)
 
     async def get_video_metadata(
         self,
@@ -186,6 +321,11 @@ class FileSystemClient:
         Returns:
             视频元数据，失败返回 None
         """
+        # 检查缓存是否有效
+        cached = self._metadata_cache.get(aweme_id)
+        if cached is not None and time.time() - cached[0] < self.metadata_cache_ttl:
+            return cached[1]
+
         # 构建元数据 URL（filename 格式为 {aweme_id}.wav）
         filename = f"{aweme_id}.wav"
         metadata_url = f"{self.base_url}/api/metadata/{filename}"
@@ -193,46 +333,83 @@ class FileSystemClient:
         logger.debug(f"获取视频元数据: {aweme_id}")
 
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(metadata_url)
-
-                if response.status_code == 200:
-                    data = response.json()
+            response = await self._client.get(metadata_url, timeout=self._metadata_timeout)
 
-                    # 检查 success 字段
-                    if not data.get("success", False):
-                        logger.warning(f"获取视频元数据失败: {data.get('error', 'Unknown error')}")
-                        return None
+            if response.status_code == 200:
+                data = orjson.loads(response.content)
 
-                    metadata_data = data.get("metadata", {})
-                    if not metadata_data:
-                        return None
+                # 检查 success 字段
+                if not data.get("success", False):
+                    logger.warning(f"获取视频元数据失败: {data.get('error', 'Unknown error')}")
+                    return None
 
-                    return VideoMetadata(
+                metadata_data = data.get("metadata", {})
+                metadata = None
+                if metadata_data:
+                    metadata = VideoMetadata(
                         filename=metadata_data.get("filename", filename),
                         title=metadata_data.get("title", ""),
                         author=metadata_data.get("author", ""),
                         description=metadata_data.get("description", ""),
                         upload_time=metadata_data.get("upload_time", "")
                     )
-                elif response.status_code == 404:
-                    logger.debug(f"视频元数据不存在: {aweme_id}")
-                    return None
-                else:
-                    logger.warning(
-                        f"获取视频元数据失败: HTTP {response.status_code}, "
-                        f"{response.text}"
-                    )
-                    return None
+
+                self._cache_metadata(aweme_id, metadata)
+                return metadata
+            elif response.status_code == 404:
+                logger.debug(f"视频元数据不存在: {aweme_id}")
+                self._cache_metadata(aweme_id, None)
+                return None
+            else:
+                logger.warning(
+                    f"获取视频元数据失败: HTTP {response.status_code}, "
+                    f"{response.text}"
+                )
+                return None
 
         except Exception as e:
             logger.error(f"获取视频元数据异常: {e}")
             return None
 
+    async def get_videos_metadata(
+        self,
+        aweme_ids: List[str],
+        max_concurrency: int = 16
+    ) -> List[Optional[VideoMetadata]]:
+        """并发获取多个视频的元数据
+
+        Args:
+            aweme_ids: 视频 ID 列表
+            max_concurrency: 同时进行的请求数量上限
+
+        Returns:
+            与 aweme_ids 一一对应的元数据，失败为 None
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def _fetch(aweme_id: str) -> Optional[VideoMetadata]:
+            async with semaphore:
+                return await self.get_video_metadata(aweme_id)
+
+        return await asyncio.gather(*(_fetch(aweme_id) for aweme_id in aweme_ids))
+
+    def _cache_metadata(self, aweme_id: str, metadata: Optional[VideoMetadata]):
+        """写入元数据缓存，超出容量时淘汰最早写入的条目
+
+        Args:
+            aweme_id: 视频 ID
+            metadata: 视频元数据，不存在为 None
+        """
+        self._metadata_cache.pop(aweme_id, None)
+        if len(self._metadata_cache) >= self.metadata_cache_size:
+            self._metadata_cache.pop(next(iter(self._metadata_cache)))
+        self._metadata_cache[aweme_id] = (time.time(), metadata)
+
     def invalidate_video_list_cache(self):
         """清除视频列表缓存"""
         self._video_list_cache = None
         self._video_list_cache_time = 0
+        self._video_index = {}
         logger.info("视频列表缓存已清除")
 
     async def delete_video(self, aweme_id: str):
@@ -246,20 +423,20 @@ class FileSystemClient:
         delete_url = f"{self.base_url}/api/videos/{filename}"
 
         logger.info(f"删除视频文件: {aweme_id}")
+        self._metadata_cache.pop(aweme_id, None)
 
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.delete(delete_url)
-
-                if response.status_code == 200:
-                    logger.info(f"视频文件删除成功: {aweme_id}")
-                    return True
-                else:
-                    logger.error(
-                        f"视频文件删除失败: HTTP {response.status_code}, "
-                        f"{response.text}"
-                    )
-                    return False
+            response = await self._client.delete(delete_url, timeout=self._query_timeout)
+
+            if response.status_code == 200:
+                logger.info(f"视频文件删除成功: {aweme_id}")
+                return True
+            else:
+                logger.error(
+                    f"视频文件删除失败: HTTP {response.status_code}, "
+                    f"{response.text}"
+                )
+                return False
 
         except Exception as e:
             logger.error(f"视频文件删除异常: {e}")
@@ -279,26 +456,26 @@ class FileSystemClient:
         logger.info(f"标记文件为已读: {filename}")
 
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    url,
-                    json={"filename": filename}
-                )
-
-                if response.status_code == 200:
-                    data = response.json()
-                    if data.get("success", False):
-                        logger.info(f"文件已标记为已读: {filename}")
-                        return True
-                    else:
-                        logger.error(f"标记已读失败: {data.get('error', 'Unknown error')}")
-                        return False
+            response = await self._client.post(
+                url,
+                json={"filename": filename},
+                timeout=self._query_timeout
+            )
+
+            if response.status_code == 200:
+                data = orjson.loads(response.content)
+                if data.get("success", False):
+                    logger.info(f"文件已标记为已读: {filename}")
+                    return True
                 else:
-                    logger.error(
-                        f"标记已读失败: HTTP {response.status_code}, "
-                        f"{response.text}"
-                    )
+                    logger.error(f"标记已读失败: {data.get('error', 'Unknown error')}")
                     return False
+            else:
+                logger.error(
+                    f"标记已读失败: HTTP {response.status_code}, "
+                    f"{response.text}"
+                )
+                return False
 
         except Exception as e:
             logger.error(f"标记已读异常: {e}")
@@ -1,49 +1,161 @@
 """
 状态管理器
 管理视频处理状态，使用 JSON 文件存储
+
+状态变更先追加写入日志文件（status.log），再由后台任务定期
+合并写入 status.json，避免每次变更都重写整个状态文件。
 """
 
 import asyncio
+import os
 from pathlib import Path
 from typing import Optional
 from datetime import datetime
 from loguru import logger
+import orjson
 
 from src.models import ProcessStatus
 from src.utils import load_json, save_json
 
 
+def _iso_to_timestamp(value: str) -> Optional[int]:
+    """将 ISO 格式时间字符串转换为秒级时间戳
+
+    Args:
+        value: ISO 格式时间字符串
+
+    Returns:
+        时间戳，格式无效返回 None
+    """
+    try:
+        return int(datetime.fromisoformat(value).timestamp())
+    except (TypeError, ValueError):
+        return None
+
+
 class StatusManager:
     """状态管理器"""
 
-    def __init__(self, status_file: str = "data/status.json"):
+    def __init__(
+        self,
+        status_file: str = "data/status.json",
+        flush_interval: float = 1.0
+    ):
         """初始化状态管理器
 
         Args:
             status_file: 状态文件路径
+            flush_interval: 状态文件合并写入间隔（秒）
         """
         self.status_file = Path(status_file)
         self.status_file.parent.mkdir(parents=True, exist_ok=True)
+        self.journal_file = self.status_file.with_suffix(".log")
+        self.flush_interval = flush_interval
 
-        # 加载现有状态
+        # 加载现有状态（包括上次未合并的变更日志）
+        # 锁只用于串行化写入；读取在事件循环内同步完成，无需加锁
         self._lock = asyncio.Lock()
+        self._dirty = False
         self._data = self._load()
+        self._videos: dict = self._data["videos"]
+        self._flush_task: Optional[asyncio.Task] = None
+        self._journal_fd = os.open(
+            self.journal_file,
+            os.O_WRONLY | os.O_CREAT | os.O_APPEND,
+            0o644
+        )
 
         logger.info(f"状态管理器初始化完成: {status_file}")
 
     def _load(self) -> dict:
-        """加载状态文件"""
+        """加载状态文件，并重放变更日志"""
         if self.status_file.exists():
-            return load_json(str(self.status_file))
-        return {
-            "last_updated": datetime.now().isoformat(),
-            "videos": {}
-        }
+            data = load_json(str(self.status_file))
+        else:
+            data = {
+                "last_updated": datetime.now().isoformat()
+            }
+        videos = data.setdefault("videos", {})
+
+        if self.journal_file.exists():
+            replayed = 0
+            with open(self.journal_file, "rb") as f:
+                for line in f:
+                    try:
+                        entry = orjson.loads(line)
+                    except orjson.JSONDecodeError:
+                        # 崩溃时可能留下不完整的最后一行
+                        continue
+                    if entry["video"] is None:
+                        videos.pop(entry["aweme_id"], None)
+                    else:
+                        videos[entry["aweme_id"]] = entry["video"]
+                    replayed += 1
+
+            if replayed:
+                logger.info(f"已重放 {replayed} 条状态变更日志")
+                self._dirty = True
+
+        # 旧版本的状态记录只有 ISO 时间字符串，补齐对应的时间戳
+        for video_data in videos.values():
+            for key in ("updated_at", "read_at"):
+                ts_key = f"{key}_ts"
+                if ts_key not in video_data and video_data.get(key):
+                    video_data[ts_key] = _iso_to_timestamp(video_data[key])
+
+        return data
+
+    def _record(self, aweme_id: str):
+        """记录一条状态变更（调用方需持有锁）
 
-    def _save(self):
-        """保存状态文件"""
-        self._data["last_updated"] = datetime.now().isoformat()
-        save_json(self._data, str(self.status_file))
+        Args:
+            aweme_id: 发生变更的视频 ID
+        """
+        line = orjson.dumps(
+            {"aweme_id": aweme_id, "video": self._videos.get(aweme_id)},
+            option=orjson.OPT_APPEND_NEWLINE
+        )
+        os.write(self._journal_fd, line)
+
+        self._dirty = True
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flusher())
+
+    async def _flusher(self):
+        """后台定期合并写入状态文件"""
+        while self._dirty:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"保存状态文件失败: {e}")
+
+    async def flush(self):
+        """将内存中的状态写入状态文件，并清空变更日志"""
+        async with self._lock:
+            if not self._dirty:
+                return
+
+            self._data["last_updated"] = datetime.now().isoformat()
+            # 状态文件仅供程序读取，使用紧凑格式减少写入量
+            await asyncio.to_thread(
+                save_json, self._data, str(self.status_file), indent=None
+            )
+            os.ftruncate(self._journal_fd, 0)
+            self._dirty = False
+
+    async def close(self):
+        """停止后台写入并保存最终状态"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+
+        await self.flush()
+        os.close(self._journal_fd)
 
     async def get_status(self, aweme_id: str) -> Optional[str]:
         """获取视频处理状态
@@ -54,9 +166,8 @@ class StatusManager:
         Returns:
             状态（pending/processing/completed/failed），不存在返回 None
         """
-        async with self._lock:
-            video_data = self._data.get("videos", {}).get(aweme_id)
-            return video_data.get("status") if video_data else None
+        video_data = self._videos.get(aweme_id)
+        return video_data.get("status") if video_data else None
 
     async def set_status(
         self,
@@ -72,22 +183,20 @@ class StatusManager:
             error: 错误信息
         """
         async with self._lock:
-            now = datetime.now().isoformat()
+            now = datetime.now()
 
-            if aweme_id not in self._data.get("videos", {}):
-                self._data.setdefault("videos", {})[aweme_id] = {
-                    "created_at": now
-                }
+            video_data = self._videos.get(aweme_id)
+            if video_data is None:
+                video_data = self._videos[aweme_id] = {"created_at": now.isoformat()}
 
-            self._data["videos"][aweme_id].update({
-                "status": status,
-                "updated_at": now
-            })
+            video_data["status"] = status
+            video_data["updated_at"] = now.isoformat()
+            video_data["updated_at_ts"] = int(now.timestamp())
 
             if error:
-                self._data["videos"][aweme_id]["error"] = error
+                video_data["error"] = error
 
-            self._save()
+            self._record(aweme_id)
 
     async def mark_processing(self, aweme_id: str):
         """标记为处理中"""
@@ -118,14 +227,23 @@ class StatusManager:
 
     async def get_pending_count(self) -> int:
         """获取待处理视频数量"""
-        async with self._lock:
-            videos = self._data.get("videos", {})
-            return sum(1 for v in videos.values() if v.get("status") == "pending")
+        return sum(1 for v in self._videos.values() if v.get("status") == "pending")
+
+    async def get_video_status(self, aweme_id: str) -> dict:
+        """获取单个视频的完整状态记录
+
+        Args:
+            aweme_id: 视频 ID
+
+        Returns:
+            状态记录副本，不存在返回空字典
+        """
+        video_data = self._videos.get(aweme_id)
+        return dict(video_data) if video_data else {}
 
     async def get_all_statuses(self) -> dict:
         """获取所有视频状态"""
-        async with self._lock:
-            return self._data.get("videos", {}).copy()
+        return self._videos.copy()
 
     async def mark_read(self, aweme_id: str, is_read: bool = True):
         """标记视频已读/未读
@@ -135,21 +253,17 @@ class StatusManager:
             is_read: 是否已读
         """
         async with self._lock:
-            now = datetime.now().isoformat()
+            now = datetime.now()
 
-            if aweme_id not in self._data.get("videos", {}):
-                self._data.setdefault("videos", {})[aweme_id] = {
-                    "created_at": now
-                }
+            video_data = self._videos.get(aweme_id)
+            if video_data is None:
+                video_data = self._videos[aweme_id] = {"created_at": now.isoformat()}
 
-            if is_read:
-                self._data["videos"][aweme_id]["is_read"] = True
-                self._data["videos"][aweme_id]["read_at"] = now
-            else:
-                self._data["videos"][aweme_id]["is_read"] = False
-                self._data["videos"][aweme_id]["read_at"] = None
+            video_data["is_read"] = is_read
+            video_data["read_at"] = now.isoformat() if is_read else None
+            video_data["read_at_ts"] = int(now.timestamp()) if is_read else None
 
-            self._save()
+            self._record(aweme_id)
             logger.info(f"视频 {aweme_id} 已标记为 {'已读' if is_read else '未读'}")
 
     async def hard_delete(self, aweme_id: str):
@@ -159,10 +273,9 @@ class StatusManager:
             aweme_id: 视频 ID
         """
         async with self._lock:
-            videos = self._data.get("videos", {})
-            if aweme_id in videos:
-                del videos[aweme_id]
-                self._save()
+            if aweme_id in self._videos:
+                del self._videos[aweme_id]
+                self._record(aweme_id)
                 logger.info(f"视频 {aweme_id} 已从状态文件中删除")
 
     async def get_read_status(self, aweme_id: str) -> dict:
@@ -174,9 +287,8 @@ class StatusManager:
         Returns:
             包含 is_read 和 read_at 的字典
         """
-        async with self._lock:
-            video_data = self._data.get("videos", {}).get(aweme_id, {})
-            return {
-                "is_read": video_data.get("is_read", False),
-                "read_at": video_data.get("read_at")
-            }
+        video_data = self._videos.get(aweme_id, {})
+        return {
+            "is_read": video_data.get("is_read", False),
+            "read_at": video_data.get("read_at")
+        }
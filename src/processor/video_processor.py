@@ -3,26 +3,93 @@
 协调整个音频处理流程：获取音频列表、ASR识别、保存结果
 """
 
+import asyncio
+import os
 import time
+from collections import OrderedDict
 from pathlib import Path
+from typing import Optional
 from loguru import logger
 
-from src.models import TranscriptResult, ProcessResult
+from src.models import TranscriptResult, TranscriptSegment, ProcessResult
+from src.processor import WAV_FILTER
 from src.processor.filesystem_client import FileSystemClient
 from src.processor.asr_client import AliyunASRClient
 from src.processor.status_manager import StatusManager
-from src.utils import save_json
+from src.processor.artifact_writer import AsyncArtifactWriter
+from src.utils import load_json, load_json_mmap
+
+# 结果摘要文件保存的字段（不含 segments，列表页只需要这些）
+SUMMARY_FIELDS = (
+    "aweme_id",
+    "text",
+    "confidence",
+    "audio_duration",
+    "title",
+    "author",
+    "description",
+    "upload_time",
+)
+
+# 输出目录文件列表的缓存有效期（秒）
+OUTPUT_LISTING_TTL = 5.0
+
+# 超过该大小的结果文件通过内存映射读取（1 MB）
+MMAP_THRESHOLD = 1 << 20
+
+
+def build_summary(result_data: dict) -> dict:
+    """从完整识别结果生成摘要
+
+    Args:
+        result_data: 完整识别结果
+
+    Returns:
+        摘要数据，segments 只保留数量 seg_count
+    """
+    summary = {
+        key: result_data[key]
+        for key in SUMMARY_FIELDS
+        if key in result_data
+    }
+    summary["seg_count"] = len(result_data.get("segments") or ())
+    return summary
+
+
+def _cache_put(cache: OrderedDict, key: str, value: dict, max_size: int):
+    """写入 LRU 缓存，超出容量时淘汰最久未使用的条目
+
+    Args:
+        cache: 缓存
+        key: 键
+        value: 值
+        max_size: 缓存容量，0 表示不缓存
+    """
+    if max_size <= 0:
+        return
+    cache[key] = value
+    if len(cache) > max_size:
+        cache.popitem(last=False)
 
 
 class VideoProcessor:
-    """音频处理器"""
+    """音频处理器
+
+    输出目录中的结果文件只能由一个 VideoProcessor 写入：
+    结果与摘要缓存、输出目录文件名缓存不会感知其他进程的修改。
+    """
 
     def __init__(
         self,
         filesystem_client: FileSystemClient,
         asr_client: AliyunASRClient,
         status_manager: StatusManager,
-        output_dir: str = "data/output"
+        output_dir: str = "data/output",
+        max_concurrency: int = 8,
+        asr_batch_size: int = 32,
+        result_cache_size: int = 256,
+        summary_cache_size: int = 10000,
+        write_batch_size: int = 64
     ):
         """初始化音频处理器
 
@@ -31,28 +98,246 @@ class VideoProcessor:
             asr_client: ASR 客户端
             status_manager: 状态管理器
             output_dir: 输出目录
+            max_concurrency: 同时处理的 ASR 批次数量上限
+            asr_batch_size: 每个 ASR 任务提交的音频数量
+            result_cache_size: 内存中缓存的识别结果数量
+            summary_cache_size: 内存中缓存的结果摘要数量
+            write_batch_size: 结果文件每批写入的最大数量
         """
         self.filesystem_client = filesystem_client
         self.asr_client = asr_client
         self.status_manager = status_manager
         self.output_dir = Path(output_dir)
+        self.max_concurrency = max(1, max_concurrency)
+        self.asr_batch_size = max(1, asr_batch_size)
+        self.result_cache_size = result_cache_size
+        self.summary_cache_size = summary_cache_size
+
+        # 已读取的识别结果缓存（LRU，不缓存超过 MMAP_THRESHOLD 的大结果）。
+        # 以下缓存只在本进程写入或删除结果文件时失效，输出目录只能由
+        # 当前进程写入；其他进程修改的文件要等缓存淘汰或过期后才可见
+        self._result_cache: OrderedDict[str, dict] = OrderedDict()
+        self._summary_cache: OrderedDict[str, dict] = OrderedDict()
+
+        # 输出目录中的文件名集合（短时缓存），批量读取时代替逐个 stat
+        self._output_names: Optional[set[str]] = None
+        self._output_names_time: float = 0
+
+        # 结果文件由单个后台任务批量写盘
+        self._writer = AsyncArtifactWriter(batch_size=write_batch_size)
+
+        # 正在进行的 process_all 任务，同一时间只运行一个
+        self._bg_task: Optional[asyncio.Task] = None
 
         logger.info("音频处理器初始化完成")
 
-    async def process_all(self) -> dict:
+    async def close(self):
+        """停止正在进行的处理任务，等待结果文件写完并停止后台写入任务
+
+        处理任务（包括其收尾协程）完全退出后才关闭写入器，
+        之后不会再有新的写入请求。
+        """
+        if self._bg_task is not None:
+            self._bg_task.cancel()
+            try:
+                await self._bg_task
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                logger.error(f"处理任务异常退出: {e}")
+        self._bg_task = None
+
+        await self._writer.close()
+
+    @property
+    def is_processing(self) -> bool:
+        """是否有 process_all 任务正在进行"""
+        return self._bg_task is not None and not self._bg_task.done()
+
+    def start_process_all(
+        self,
+        prefetched_statuses: Optional[dict] = None
+    ) -> Optional[asyncio.Task]:
+        """在后台启动 process_all（已有任务在进行时不重复启动）
+
+        Args:
+            prefetched_statuses: 调用方已获取的状态快照
+
+        Returns:
+            新启动的任务，已有任务在进行时返回 None
+        """
+        if self.is_processing:
+            return None
+
+        self._bg_task = asyncio.create_task(
+            self.process_all(prefetched_statuses=prefetched_statuses)
+        )
+        return self._bg_task
+
+    async def load_result(self, aweme_id: str) -> Optional[dict]:
+        """读取识别结果（优先使用内存缓存，未命中时在线程中读取文件）
+
+        Args:
+            aweme_id: 视频 ID
+
+        Returns:
+            结果数据（副本，可自由修改），结果文件不存在返回 None
+        """
+        cached = self._result_cache.get(aweme_id)
+        if cached is not None:
+            self._result_cache.move_to_end(aweme_id)
+            return dict(cached)
+
+        result_file = self.output_dir / f"{aweme_id}.json"
+        data, size = await asyncio.to_thread(self._read_result_file, result_file)
+        if data is None:
+            return None
+
+        # 大结果文件不进入缓存，避免少量长音频结果占用大量内存
+        if size <= MMAP_THRESHOLD:
+            _cache_put(self._result_cache, aweme_id, data, self.result_cache_size)
+        return dict(data)
+
+    async def load_summaries(self, aweme_ids: list[str]) -> list[Optional[dict]]:
+        """批量读取识别结果摘要
+
+        扫描一次输出目录判断文件是否存在，未命中缓存的文件在同一个线程中依次读取。
+
+        Args:
+            aweme_ids: 视频 ID 列表
+
+        Returns:
+            与 aweme_ids 一一对应的摘要数据（副本），结果文件不存在或读取失败为 None
+        """
+        summaries: list[Optional[dict]] = [None] * len(aweme_ids)
+        to_read = []
+        names = await self._list_output_names()
+
+        for i, aweme_id in enumerate(aweme_ids):
+            cached = self._summary_cache.get(aweme_id)
+            if cached is not None:
+                self._summary_cache.move_to_end(aweme_id)
+                summaries[i] = dict(cached)
+            elif f"{aweme_id}.summary.json" in names:
+                to_read.append((i, aweme_id, True))
+            elif f"{aweme_id}.json" in names:
+                to_read.append((i, aweme_id, False))
+
+        if to_read:
+            loaded = await asyncio.to_thread(self._read_summary_files, to_read)
+            for (i, aweme_id, _), summary in zip(to_read, loaded):
+                if summary is not None:
+                    _cache_put(
+                        self._summary_cache, aweme_id, summary, self.summary_cache_size
+                    )
+                    summaries[i] = dict(summary)
+
+        return summaries
+
+    def _read_summary_files(self, to_read: list) -> list[Optional[dict]]:
+        """依次读取多个摘要（在线程中执行）
+
+        Args:
+            to_read: (序号, 视频 ID, 是否有摘要文件) 列表
+
+        Returns:
+            摘要数据列表，读取失败为 None
+        """
+        summaries = []
+        for _, aweme_id, has_summary in to_read:
+            try:
+                if has_summary:
+                    summary_file = self.output_dir / f"{aweme_id}.summary.json"
+                    summaries.append(load_json(str(summary_file)))
+                else:
+                    result_file = self.output_dir / f"{aweme_id}.json"
+                    summaries.append(build_summary(load_json(str(result_file))))
+            except Exception as e:
+                logger.warning(f"读取结果摘要失败: {aweme_id} - {e}")
+                summaries.append(None)
+        return summaries
+
+    async def _list_output_names(self) -> set[str]:
+        """获取输出目录中的文件名集合（缓存 OUTPUT_LISTING_TTL 秒）"""
+        current_time = time.time()
+        if (
+            self._output_names is None or
+            current_time - self._output_names_time >= OUTPUT_LISTING_TTL
+        ):
+            self._output_names = await asyncio.to_thread(self._scan_output_dir)
+            self._output_names_time = current_time
+        return self._output_names
+
+    def _scan_output_dir(self) -> set[str]:
+        """扫描输出目录（在线程中执行）"""
+        try:
+            with os.scandir(self.output_dir) as entries:
+                return {entry.name for entry in entries}
+        except FileNotFoundError:
+            return set()
+
+    @staticmethod
+    def _read_result_file(result_file: Path) -> tuple[Optional[dict], int]:
+        """读取结果文件（在线程中执行）
+
+        Args:
+            result_file: 结果文件路径
+
+        Returns:
+            (结果数据, 文件大小)，文件不存在返回 (None, 0)
+        """
+        try:
+            size = result_file.stat().st_size
+        except FileNotFoundError:
+            return None, 0
+
+        # 长音频的结果文件可能有上万个分段，使用内存映射读取
+        if size > MMAP_THRESHOLD:
+            return load_json_mmap(str(result_file)), size
+        return load_json(str(result_file)), size
+
+    def delete_result(self, aweme_id: str) -> bool:
+        """删除识别结果文件
+
+        Args:
+            aweme_id: 视频 ID
+
+        Returns:
+            是否删除了结果文件
+        """
+        self._result_cache.pop(aweme_id, None)
+        self._summary_cache.pop(aweme_id, None)
+        if self._output_names is not None:
+            self._output_names.discard(f"{aweme_id}.json")
+            self._output_names.discard(f"{aweme_id}.summary.json")
+
+        summary_file = self.output_dir / f"{aweme_id}.summary.json"
+        summary_file.unlink(missing_ok=True)
+
+        result_file = self.output_dir / f"{aweme_id}.json"
+        if not result_file.exists():
+            return False
+
+        result_file.unlink()
+        logger.info(f"已删除结果文件: {result_file}")
+        return True
+
+    async def process_all(self, prefetched_statuses: Optional[dict] = None) -> dict:
         """处理所有音频
 
+        Args:
+            prefetched_statuses: 调用方已获取的状态快照，为空时重新获取
+
         Returns:
             处理结果统计
         """
         logger.info("开始处理所有音频")
 
-        # 获取音频列表（过滤 .wav 文件）
-        videos = await self.filesystem_client.get_video_list(
-            filters={"suffix": ".wav"}
-        )
+        # 获取音频数量（过滤 .wav 文件）
+        filters = WAV_FILTER
+        total = await self.filesystem_client.count_videos(filters=filters)
 
-        if not videos:
+        if not total:
             logger.warning("没有找到音频文件")
             return {
                 "total": 0,
@@ -61,31 +346,100 @@ class VideoProcessor:
                 "failed": 0
             }
 
-        logger.info(f"找到 {len(videos)} 个音频文件")
+        logger.info(f"找到 {total} 个音频文件")
 
         # 统计结果
-        total = len(videos)
         processed = 0
         success = 0
         failed = 0
 
-        # 逐个处理音频
-        for video in videos:
-            # 检查是否已处理
-            if await self.status_manager.is_completed(video.aweme_id):
+        # 过滤已处理的音频（一次性获取所有状态）
+        all_statuses = prefetched_statuses
+        if all_statuses is None:
+            all_statuses = await self.status_manager.get_all_statuses()
+        completed_ids = {
+            aweme_id
+            for aweme_id, status_data in all_statuses.items()
+            if status_data.get("status") == "completed"
+        }
+
+        # 扫描一次输出目录，只对已有结果文件的音频尝试复用
+        output_names = await self._list_output_names()
+
+        pending_videos = []
+        async for video in self.filesystem_client.iter_videos(filters=filters):
+            if video.aweme_id in completed_ids:
                 logger.info(f"音频已处理，跳过: {video.aweme_id}")
                 processed += 1
                 success += 1
-                continue
-
-            # 处理音频
-            result = await self.process_audio(video)
+            elif (
+                f"{video.aweme_id}.json" in output_names and
+                await self._restore_result(video)
+            ):
+                processed += 1
+                success += 1
+            else:
+                pending_videos.append(video)
+
+        # 流水线处理：识别阶段分批提交 ASR 任务（批次之间并发，限制同时进行的批次数量），
+        # 收尾阶段（获取元数据、保存结果、更新状态）由独立的工作协程消费，
+        # 与仍在进行的 ASR 批次重叠执行
+        batches = [
+            pending_videos[i:i + self.asr_batch_size]
+            for i in range(0, len(pending_videos), self.asr_batch_size)
+        ]
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        finish_queue: asyncio.Queue = asyncio.Queue()
+        results: list[ProcessResult] = []
+
+        async def _transcribe_stage(batch):
+            async with semaphore:
+                await self._transcribe_batch(batch, finish_queue)
+
+        async def _finish_stage():
+            while True:
+                item = await finish_queue.get()
+                if item is None:
+                    return
+                if isinstance(item, ProcessResult):
+                    results.append(item)
+                else:
+                    results.append(await self._finish(*item))
+
+        finishers = [
+            asyncio.create_task(_finish_stage())
+            for _ in range(self.max_concurrency)
+        ]
 
-            processed += 1
+        try:
+            stage_errors = await asyncio.gather(
+                *[_transcribe_stage(batch) for batch in batches],
+                return_exceptions=True
+            )
+            for error in stage_errors:
+                if isinstance(error, BaseException):
+                    logger.error(f"批次处理异常: {error}")
+
+            # 识别阶段全部结束，通知收尾协程退出
+            for _ in finishers:
+                await finish_queue.put(None)
+            await asyncio.gather(*finishers)
+            await self._writer.flush()
+        finally:
+            # 出错或被取消时停止收尾协程，并等待其真正退出，
+            # 之后不会再有状态更新或结果写入
+            for finisher in finishers:
+                finisher.cancel()
+            await asyncio.gather(*finishers, return_exceptions=True)
+
+        processed += len(pending_videos)
+        for result in results:
             if result.success:
                 success += 1
             else:
                 failed += 1
+        # 批次异常中断时未产生结果的音频计为失败
+        failed += len(pending_videos) - len(results)
 
         summary = {
             "total": total,
@@ -102,44 +456,128 @@ class VideoProcessor:
 
         return summary
 
-    async def process_audio(self, video) -> ProcessResult:
-        """处理单个音频
+    async def _transcribe_batch(self, videos: list, finish_queue: asyncio.Queue):
+        """识别一批音频（一个 ASR 任务识别多个文件），结果放入收尾队列
+
+        Args:
+            videos: 音频信息列表
+            finish_queue: 收尾队列，放入失败结果或 (音频, 识别结果, 开始时间)
+        """
+        start_time = time.time()
+
+        logger.info(f"开始批量处理音频: {len(videos)} 个")
+
+        ready = []
+        for video in videos:
+            failure = await self._begin(video)
+            if failure:
+                await finish_queue.put(failure)
+            else:
+                ready.append(video)
+
+        if not ready:
+            return
+
+        try:
+            transcripts = await self.asr_client.transcribe_batch(
+                [video.url for video in ready]
+            )
+        except Exception as e:
+            logger.error(f"批量识别异常: {e}")
+            transcripts = [None] * len(ready)
+
+        for video, transcript in zip(ready, transcripts):
+            await finish_queue.put((video, transcript, start_time))
+
+    async def _restore_result(self, video) -> Optional[ProcessResult]:
+        """复用已存在的识别结果文件
+
+        结果文件按 aweme_id 保存，同一 ID 的音频内容不会变化。
+        状态文件丢失或重置时，直接使用已有结果，不再重复提交 ASR。
+
+        Args:
+            video: 音频信息（调用方已确认输出目录中有其结果文件）
+
+        Returns:
+            复用成功返回处理结果，否则返回 None
+        """
+        aweme_id = video.aweme_id
+        output_file = self.output_dir / f"{aweme_id}.json"
+
+        try:
+            data = await asyncio.to_thread(load_json, str(output_file))
+            transcript = TranscriptResult(
+                text=data["text"],
+                segments=[
+                    TranscriptSegment(**seg)
+                    for seg in data.get("segments", [])
+                ],
+                confidence=data.get("confidence", 0.0),
+                audio_duration=data.get("audio_duration", 0.0)
+            )
+        except Exception as e:
+            logger.warning(f"已有识别结果无法读取，重新识别: {aweme_id} - {e}")
+            return None
+
+        await self.status_manager.mark_completed(aweme_id)
+        logger.info(f"复用已有识别结果: {aweme_id}")
+
+        return ProcessResult(
+            aweme_id=aweme_id,
+            success=True,
+            transcript=transcript
+        )
+
+    async def _begin(self, video) -> Optional[ProcessResult]:
+        """标记音频为处理中并校验 URL
 
         Args:
             video: 音频信息
 
         Returns:
-            处理结果
+            校验失败时返回失败结果，否则返回 None
         """
         aweme_id = video.aweme_id
-        start_time = time.time()
 
         logger.info(f"开始处理音频: {aweme_id}")
 
-        try:
-            # 标记为处理中
-            await self.status_manager.mark_processing(aweme_id)
+        # 标记为处理中
+        await self.status_manager.mark_processing(aweme_id)
 
-            # 直接使用 file-system-go 的公网 URL
-            audio_url = video.url  # 如: http://your-ecs-ip:8000/audio/xxx.wav
+        # 直接使用 file-system-go 的公网 URL
+        audio_url = video.url  # 如: http://your-ecs-ip:8000/audio/xxx.wav
 
-            if not audio_url:
-                error = "音频 URL 为空"
-                await self.status_manager.mark_failed(aweme_id, error)
-                return ProcessResult(
-                    aweme_id=aweme_id,
-                    success=False,
-                    error_message=error
-                )
+        if not audio_url:
+            error = "音频 URL 为空"
+            await self.status_manager.mark_failed(aweme_id, error)
+            return ProcessResult(
+                aweme_id=aweme_id,
+                success=False,
+                error_message=error
+            )
 
-            logger.info(f"音频 URL: {audio_url}")
+        logger.info(f"音频 URL: {audio_url}")
+        return None
 
-            # ASR 识别（传入 URL 和虚拟的本地文件路径）
-            transcript = await self.asr_client.transcribe_file(
-                audio_file="",  # 不需要本地文件
-                file_url=audio_url
-            )
+    async def _finish(
+        self,
+        video,
+        transcript: Optional[TranscriptResult],
+        start_time: float
+    ) -> ProcessResult:
+        """保存识别结果并更新状态
 
+        Args:
+            video: 音频信息
+            transcript: 识别结果，识别失败为 None
+            start_time: 开始处理的时间戳
+
+        Returns:
+            处理结果
+        """
+        aweme_id = video.aweme_id
+
+        try:
             # 保存结果
             if transcript:
                 # 获取元数据（从 file-system-go）
@@ -198,15 +636,7 @@ class VideoProcessor:
         output_data = {
             "aweme_id": aweme_id,
             "text": transcript.text,
-            "segments": [
-                {
-                    "start_time": seg.start_time,
-                    "end_time": seg.end_time,
-                    "text": seg.text,
-                    "confidence": seg.confidence
-                }
-                for seg in transcript.segments
-            ],
+            "segments": transcript.segments,  # orjson 直接序列化 dataclass
             "confidence": transcript.confidence,
             "audio_duration": transcript.audio_duration
         }
@@ -220,7 +650,16 @@ class VideoProcessor:
                 "upload_time": metadata.upload_time
             })
 
-        # 保存为 JSON 文件
-        save_json(output_data, str(output_file))
+        # 交给后台任务写入 JSON 文件，等待写完再继续（之后才会标记为已完成）
+        # 摘要文件供列表页使用，避免读取完整的 segments；
+        # 结果文件写入成功后才写摘要，列表中不会出现没有结果文件的视频
+        summary_file = self.output_dir / f"{aweme_id}.summary.json"
+        await self._writer.write(output_file, output_data)
+        await self._writer.write(summary_file, build_summary(output_data))
+        self._result_cache.pop(aweme_id, None)
+        self._summary_cache.pop(aweme_id, None)
+        if self._output_names is not None:
+            self._output_names.add(output_file.name)
+            self._output_names.add(summary_file.name)
 
         logger.info(f"识别结果已保存: {output_file}")
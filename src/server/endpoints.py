@@ -3,20 +3,33 @@ API 接口端点
 """
 
 import asyncio
-from datetime import datetime
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Query
-from pydantic import BaseModel
-from typing import Optional, List
-from pathlib import Path
+from collections import Counter
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Query, Request
+from fastapi.responses import JSONResponse
+from typing import Optional
 from loguru import logger
 
-from src.utils import load_json
+from src.processor import WAV_FILTER
+from src.server.schemas import (
+    ProcessResponse,
+    ResultResponse,
+    TaskResponse,
+    TranscriptInfo,
+    VideoListResponse,
+    VideoDetailResponse,
+    StatsResponse,
+    MarkReadRequest,
+    ActionResponse,
+)
 
 router = APIRouter()
 
 # 全局处理器引用（在 main.py 中设置）
 processor = None
 
+# 没有状态记录时使用的共享空字典（只读）
+_EMPTY_STATUS: dict = {}
+
 
 def set_processor(proc):
     """设置处理器实例"""
@@ -24,136 +37,55 @@ def set_processor(proc):
     processor = proc
 
 
-class ProcessResponse(BaseModel):
-    """处理响应"""
-    success: bool
-    message: str
-    data: Optional[dict] = None
-
-
-class ResultResponse(BaseModel):
-    """结果响应"""
-    success: bool
-    data: Optional[dict] = None
-
-
-class TaskResponse(BaseModel):
-    """任务响应"""
-    success: bool
-    message: str
-    data: Optional[dict] = None
-
-
-# 新增响应模型
-class TranscriptInfo(BaseModel):
-    """转写信息"""
-    text: str
-    segments: Optional[List[dict]] = None
-    confidence: float
-    audio_duration: float
-
-
-class VideoListItem(BaseModel):
-    """视频列表项"""
-    aweme_id: str
-    status: str
-    title: str
-    author: str
-    audio_url: str
-    transcript: Optional[TranscriptInfo] = None
-    processed_at: Optional[int] = None
-    upload_time: Optional[str] = None
-    is_read: bool = False
-    read_at: Optional[int] = None
-
-
-class VideoListResponse(BaseModel):
-    """视频列表响应"""
-    total_count: int
-    videos: List[VideoListItem]
-    page: int
-    page_size: int
-
-
-class VideoDetailResponse(BaseModel):
-    """视频详情响应"""
-    aweme_id: str
-    status: str
-    title: str
-    author: str
-    description: str
-    audio_url: str
-    transcript: Optional[TranscriptInfo] = None
-    processed_at: Optional[int] = None
-    upload_time: Optional[str] = None
-    error: Optional[str] = None
-    is_read: bool = False
-    read_at: Optional[int] = None
-
-
-class StatsResponse(BaseModel):
-    """统计信息响应"""
-    total: int
-    completed: int
-    processing: int
-    failed: int
-    pending: int
-    success_rate: float
-
-
-class MarkReadRequest(BaseModel):
-    """标记已读请求"""
-    is_read: bool
-
-
-class ActionResponse(BaseModel):
-    """操作响应"""
-    success: bool
-    message: str
-
-
 @router.post("/api/process/async", response_model=TaskResponse)
 async def process_videos_async():
     """异步处理所有音频（立即返回，后台处理）"""
     if processor is None:
-        raise HTTPException(status_code=500, detail="处理器未初始化")
+        raise HTTPException(status_code=503, detail="处理器未就绪")
 
     logger.info("接收到异步处理请求")
 
-    try:
-        # 获取音频列表（带缓存）
-        videos = await processor.filesystem_client.get_video_list(
-            filters={"suffix": ".wav"},
-            use_cache=True
+    if processor.is_processing:
+        return TaskResponse(
+            success=True,
+            message="后台处理任务正在进行中",
+            data={"running": True}
         )
 
-        if not videos:
+    try:
+        # 获取音频数量（带缓存）
+        filters = WAV_FILTER
+        total = await processor.filesystem_client.count_videos(filters=filters)
+
+        if not total:
             return TaskResponse(
                 success=True,
                 message="没有待处理的音频",
                 data={"total": 0, "pending": 0}
             )
 
-        # 统计待处理数量
-        pending_count = 0
-        skip_count = 0
+        # 统计待处理数量（一次性获取所有状态，并交给后台任务复用）
         all_statuses = await processor.status_manager.get_all_statuses()
-        for video in videos:
-            status_data = all_statuses.get(video.aweme_id, {})
-            status = status_data.get("status")
-            if status is None:
+        pending_count = 0
+        get_status_data = all_statuses.get
+        async for video in processor.filesystem_client.iter_videos(filters=filters):
+            if get_status_data(video.aweme_id, _EMPTY_STATUS).get("status") is None:
                 pending_count += 1
-            else:
-                skip_count += 1
+        skip_count = total - pending_count
 
-        # 创建后台任务
-        asyncio.create_task(processor.process_all())
+        # 创建后台任务（统计期间可能已有其他请求启动了任务）
+        if processor.start_process_all(prefetched_statuses=all_statuses) is None:
+            return TaskResponse(
+                success=True,
+                message="后台处理任务正在进行中",
+                data={"running": True}
+            )
 
         return TaskResponse(
             success=True,
             message="后台处理任务已启动",
             data={
-                "total": len(videos),
+                "total": total,
                 "pending": pending_count,
                 "skip": skip_count
             }
@@ -168,13 +100,17 @@ async def process_videos_async():
 async def process_videos():
     """同步处理所有音频（等待处理完成）"""
     if processor is None:
-        raise HTTPException(status_code=500, detail="处理器未初始化")
+        raise HTTPException(status_code=503, detail="处理器未就绪")
 
     logger.info("接收到处理请求")
 
+    task = processor.start_process_all()
+    if task is None:
+        raise HTTPException(status_code=409, detail="已有处理任务正在进行")
+
     try:
-        # 同步处理（等待完成）
-        summary = await processor.process_all()
+        # 同步处理（等待完成），请求被取消时不中断处理任务
+        summary = await asyncio.shield(task)
 
         return ProcessResponse(
             success=True,
@@ -191,7 +127,7 @@ async def process_videos():
 async def get_video_result(aweme_id: str):
     """获取视频处理结果"""
     if processor is None:
-        raise HTTPException(status_code=500, detail="处理器未初始化")
+        raise HTTPException(status_code=503, detail="处理器未就绪")
 
     logger.info(f"查询视频结果: {aweme_id}")
 
@@ -231,10 +167,10 @@ async def get_video_result(aweme_id: str):
                 }
             )
 
-        # 已完成，读取结果文件
-        result_file = Path(processor.output_dir) / f"{aweme_id}.json"
+        # 已完成，读取结果文件（带缓存）
+        result_data = await processor.load_result(aweme_id)
 
-        if not result_file.exists():
+        if result_data is None:
             return ResultResponse(
                 success=True,
                 data={
@@ -244,7 +180,6 @@ async def get_video_result(aweme_id: str):
                 }
             )
 
-        result_data = load_json(str(result_file))
         result_data["status"] = "completed"
 
         return ResultResponse(
@@ -266,25 +201,23 @@ async def get_videos(
 ):
     """获取视频列表（支持分页和状态筛选）"""
     if processor is None:
-        raise HTTPException(status_code=500, detail="处理器未初始化")
+        raise HTTPException(status_code=503, detail="处理器未就绪")
 
     logger.info(f"获取视频列表: page={page}, page_size={page_size}, status={status}, is_read={is_read}")
 
     try:
-        # 获取所有视频（使用缓存）
-        all_videos = await processor.filesystem_client.get_video_list(
-            filters={"suffix": ".wav"},
-            use_cache=True
-        )
-
         # 获取所有状态
         all_statuses = await processor.status_manager.get_all_statuses()
 
-        # 第一遍：快速筛选（只读内存数据）
+        # 第一遍：快速筛选（只读内存数据，遍历缓存的视频列表）
         candidate_videos = []
-        for video in all_videos:
+        append_candidate = candidate_videos.append
+        get_status_data = all_statuses.get
+        async for video in processor.filesystem_client.iter_videos(
+            filters=WAV_FILTER
+        ):
             aweme_id = video.aweme_id
-            status_data = all_statuses.get(aweme_id, {})
+            status_data = get_status_data(aweme_id, _EMPTY_STATUS)
             video_status = status_data.get("status", "pending")
             video_is_read = status_data.get("is_read", False)
 
@@ -300,7 +233,7 @@ async def get_videos(
             if is_read is not None and video_is_read != is_read:
                 continue
 
-            candidate_videos.append({
+            append_candidate({
                 "aweme_id": aweme_id,
                 "status": video_status,
                 "is_read": video_is_read,
@@ -309,18 +242,13 @@ async def get_videos(
             })
 
         # 按上传时间倒序排序（先读取 upload_time）
-        for v in candidate_videos:
-            aweme_id = v["aweme_id"]
-            # 尝试从 output 文件读取 upload_time
-            result_file = processor.output_dir / f"{aweme_id}.json"
-            if result_file.exists():
-                try:
-                    result_data = load_json(str(result_file))
-                    v["upload_time"] = result_data.get("upload_time", "")
-                except:
-                    v["upload_time"] = ""
-            else:
-                v["upload_time"] = ""
+        # 尝试从 output 文件读取 upload_time（批量读取，文件 I/O 在线程中执行）
+        results = await processor.load_summaries(
+            [v["aweme_id"] for v in candidate_videos]
+        )
+        for v, result_data in zip(candidate_videos, results):
+            v["summary"] = result_data
+            v["upload_time"] = result_data.get("upload_time", "") if result_data else ""
 
         # 分成两组：有时间的和没时间的
         with_time = [v for v in candidate_videos if v["upload_time"]]
@@ -350,15 +278,14 @@ async def get_videos(
             # 默认值
             metadata = {"title": "", "author": "", "description": "", "upload_time": None}
             transcript = None
+            seg_count = None
             processed_at = None
             read_at = None
 
-            # 读取转写结果（仅已完成且有结果文件）
+            # 转写结果摘要（排序时已读取；仅已完成且有结果文件，segments 在详情接口中获取）
             if video_status == "completed":
-                result_file = processor.output_dir / f"{aweme_id}.json"
-                if result_file.exists():
-                    result_data = load_json(str(result_file))
-
+                result_data = v["summary"]
+                if result_data is not None:
                     # 从结果文件获取 metadata（优先）
                     if result_data.get("title"):
                         metadata = {
@@ -368,59 +295,54 @@ async def get_videos(
                             "upload_time": result_data.get("upload_time")
                         }
 
-                    transcript = TranscriptInfo(
-                        text=result_data.get("text", ""),
-                        segments=result_data.get("segments"),
-                        confidence=result_data.get("confidence", 0.0),
-                        audio_duration=result_data.get("audio_duration", 0.0)
-                    )
+                    transcript = {
+                        "text": result_data.get("text", ""),
+                        "segments": None,
+                        "confidence": result_data.get("confidence", 0.0),
+                        "audio_duration": result_data.get("audio_duration", 0.0)
+                    }
+                    seg_count = result_data.get("seg_count")
 
                     # 从状态文件获取处理时间
-                    processed_at_str = status_data.get("updated_at", "")
-                    if processed_at_str:
-                        try:
-                            processed_at = int(datetime.fromisoformat(processed_at_str).timestamp())
-                        except:
-                            pass
-
-            # 如果结果文件没有 metadata，从 file-system-go 获取
-            if not metadata["title"]:
-                md = await processor.filesystem_client.get_video_metadata(aweme_id)
-                if md:
-                    metadata = {
-                        "title": md.title,
-                        "author": md.author,
-                        "description": md.description,
-                        "upload_time": md.upload_time
-                    }
+                    processed_at = status_data.get("updated_at_ts")
 
             # 获取已读时间
-            read_at_str = status_data.get("read_at")
-            if read_at_str:
-                try:
-                    read_at = int(datetime.fromisoformat(read_at_str).timestamp())
-                except:
-                    pass
-
-            video_list.append(VideoListItem(
-                aweme_id=aweme_id,
-                status=video_status,
-                title=metadata.get("title", ""),
-                author=metadata.get("author", ""),
-                audio_url=v["audio_url"],
-                transcript=transcript,
-                processed_at=processed_at,
-                upload_time=metadata.get("upload_time"),
-                is_read=v["is_read"],
-                read_at=read_at
-            ))
-
-        return VideoListResponse(
-            total_count=total_count,
-            videos=video_list,
-            page=page,
-            page_size=page_size
-        )
+            read_at = status_data.get("read_at_ts")
+
+            video_list.append({
+                "aweme_id": aweme_id,
+                "status": video_status,
+                "title": metadata.get("title", ""),
+                "author": metadata.get("author", ""),
+                "audio_url": v["audio_url"],
+                "transcript": transcript,
+                "seg_count": seg_count,
+                "processed_at": processed_at,
+                "upload_time": metadata.get("upload_time"),
+                "is_read": v["is_read"],
+                "read_at": read_at
+            })
+
+        # 如果结果文件没有 metadata，从 file-system-go 获取（当前页并发获取）
+        missing = [item for item in video_list if not item["title"]]
+        if missing:
+            metadata_list = await processor.filesystem_client.get_videos_metadata(
+                [item["aweme_id"] for item in missing]
+            )
+            for item, md in zip(missing, metadata_list):
+                if md:
+                    item["title"] = md.title
+                    item["author"] = md.author
+                    item["upload_time"] = md.upload_time
+
+        # 直接返回字典，由 FastAPI 按 response_model 校验并序列化一次，
+        # 避免逐项构造模型后再重复校验
+        return {
+            "total_count": total_count,
+            "videos": video_list,
+            "page": page,
+            "page_size": page_size
+        }
 
     except Exception as e:
         logger.error(f"获取视频列表失败: {e}")
@@ -431,39 +353,26 @@ async def get_videos(
 async def get_video_detail(aweme_id: str):
     """获取单个视频详情"""
     if processor is None:
-        raise HTTPException(status_code=500, detail="处理器未初始化")
+        raise HTTPException(status_code=503, detail="处理器未就绪")
 
     logger.info(f"获取视频详情: {aweme_id}")
 
     try:
-        # 获取状态
-        status = await processor.status_manager.get_status(aweme_id)
-        video_status = status if status else "pending"
-
-        # 获取所有状态（用于获取详细信息和错误信息）
-        all_statuses = await processor.status_manager.get_all_statuses()
-        status_data = all_statuses.get(aweme_id, {})
+        # 获取状态记录（包括详细信息和错误信息），只读取该视频的记录
+        status_data = await processor.status_manager.get_video_status(aweme_id)
+        video_status = status_data.get("status") or "pending"
 
         # 获取已读状态
         is_read = status_data.get("is_read", False)
-        read_at = None
-        read_at_str = status_data.get("read_at")
-        if read_at_str:
-            try:
-                read_at = int(datetime.fromisoformat(read_at_str).timestamp())
-            except:
-                pass
-
-        # 获取音频 URL（使用缓存）
-        videos = await processor.filesystem_client.get_video_list(
-            filters={"suffix": ".wav"},
+        read_at = status_data.get("read_at_ts")
+
+        # 获取音频 URL（使用缓存，按 ID 直接查找）
+        video = await processor.filesystem_client.get_video(
+            aweme_id,
+            filters=WAV_FILTER,
             use_cache=True
         )
-        audio_url = ""
-        for video in videos:
-            if video.aweme_id == aweme_id:
-                audio_url = video.url
-                break
+        audio_url = video.url if video else ""
 
         # 读取转写结果和 metadata（仅已完成）
         transcript = None
@@ -475,9 +384,8 @@ async def get_video_detail(aweme_id: str):
         upload_time = None
 
         if video_status == "completed":
-            result_file = processor.output_dir / f"{aweme_id}.json"
-            if result_file.exists():
-                result_data = load_json(str(result_file))
+            result_data = await processor.load_result(aweme_id)
+            if result_data is not None:
                 transcript = TranscriptInfo(
                     text=result_data.get("text", ""),
                     segments=result_data.get("segments"),
@@ -491,12 +399,7 @@ async def get_video_detail(aweme_id: str):
                 upload_time = result_data.get("upload_time")
 
                 # 获取处理时间
-                processed_at_str = status_data.get("updated_at", "")
-                if processed_at_str:
-                    try:
-                        processed_at = int(datetime.fromisoformat(processed_at_str).timestamp())
-                    except:
-                        pass
+                processed_at = status_data.get("updated_at_ts")
         elif video_status == "failed":
             error = status_data.get("error", "未知错误")
 
@@ -533,43 +436,28 @@ async def get_video_detail(aweme_id: str):
 async def get_stats():
     """获取处理统计信息"""
     if processor is None:
-        raise HTTPException(status_code=500, detail="处理器未初始化")
+        raise HTTPException(status_code=503, detail="处理器未就绪")
 
     logger.info("获取统计信息")
 
     try:
-        # 从 file-system-go 获取所有视频列表（带缓存）
-        all_videos = await processor.filesystem_client.get_video_list(
-            filters={"suffix": ".wav"},
-            use_cache=True
-        )
+        # 从 file-system-go 获取视频数量（带缓存）
+        filters = WAV_FILTER
+        total = await processor.filesystem_client.count_videos(filters=filters)
 
-        # 从 status_manager 获取所有状态
+        # 按实际视频统计各状态数量（状态文件中可能有已不在 file-system-go 中的记录）
         all_statuses = await processor.status_manager.get_all_statuses()
-
-        # 统计各状态数量
-        completed = 0
-        processing = 0
-        failed = 0
-        pending = 0
-
-        # 遍历所有实际视频，判断其处理状态
-        for video in all_videos:
-            aweme_id = video.aweme_id
-            status_data = all_statuses.get(aweme_id, {})
-            status = status_data.get("status", "pending")
-
-            if status == "completed":
-                completed += 1
-            elif status == "processing":
-                processing += 1
-            elif status == "failed":
-                failed += 1
-            else:
-                pending += 1
-
-        # 计算总数
-        total = len(all_videos)
+        get_status_data = all_statuses.get
+        counts = Counter([
+            get_status_data(video.aweme_id, _EMPTY_STATUS).get("status", "pending")
+            async for video in processor.filesystem_client.iter_videos(filters=filters)
+        ])
+
+        completed = counts.get("completed", 0)
+        processing = counts.get("processing", 0)
+        failed = counts.get("failed", 0)
+        # 没有处理记录的视频均为待处理
+        pending = total - completed - processing - failed
 
         # 计算成功率
         success_rate = 0.0
@@ -600,11 +488,31 @@ async def health_check():
     }
 
 
+@router.get("/health/live")
+async def liveness_check():
+    """存活检查：进程已启动即返回 200"""
+    return {"status": "alive"}
+
+
+@router.get("/health/ready")
+async def readiness_check(request: Request):
+    """就绪检查：处理器初始化完成前或初始化失败时返回 503"""
+    if processor is None:
+        init_error = getattr(request.app.state, "init_error", None)
+        if init_error is not None:
+            return JSONResponse(
+                status_code=503,
+                content={"status": "failed", "error": str(init_error)}
+            )
+        return JSONResponse(status_code=503, content={"status": "starting"})
+    return {"status": "ready"}
+
+
 @router.post("/api/videos/{aweme_id}/read", response_model=ActionResponse)
 async def mark_video_read(aweme_id: str, request: MarkReadRequest):
     """标记视频已读/未读"""
     if processor is None:
-        raise HTTPException(status_code=500, detail="处理器未初始化")
+        raise HTTPException(status_code=503, detail="处理器未就绪")
 
     logger.info(f"标记视频已读状态: {aweme_id}, is_read={request.is_read}")
 
@@ -634,7 +542,7 @@ async def delete_video(aweme_id: str, keep_file: bool = False):
         keep_file: 是否保留原始文件（仅删除本地记录），默认 False
     """
     if processor is None:
-        raise HTTPException(status_code=500, detail="处理器未初始化")
+        raise HTTPException(status_code=503, detail="处理器未就绪")
 
     action = "删除记录" if keep_file else "取消收藏视频"
     logger.info(f"{action}: {aweme_id}")
@@ -652,10 +560,7 @@ async def delete_video(aweme_id: str, keep_file: bool = False):
         await processor.status_manager.hard_delete(aweme_id)
 
         # 3. 删除结果文件（如果存在）
-        result_file = Path(processor.output_dir) / f"{aweme_id}.json"
-        if result_file.exists():
-            result_file.unlink()
-            logger.info(f"已删除结果文件: {result_file}")
+        processor.delete_result(aweme_id)
 
         # 4. 清除视频列表缓存
         processor.filesystem_client.invalidate_video_list_cache()
@@ -2,112 +2,196 @@
 FastAPI 服务器
 """
 
+import asyncio
 import os
 from contextlib import asynccontextmanager
+from typing import Mapping
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 from loguru import logger
 
 from src.server.endpoints import router, set_processor
-from src.processor.filesystem_client import FileSystemClient
-from src.processor.asr_client import AliyunASRClient
-from src.processor.status_manager import StatusManager
-from src.processor.video_processor import VideoProcessor
-from src.utils import load_config, setup_logger
+from src.utils import freeze_config, load_config, setup_logger
 
 # 加载 .env 文件
 load_dotenv()
 
 # 加载配置
-config = load_config("config/app.yaml")
+config = freeze_config(load_config("config/app.yaml"))
 
 # 设置日志
-log_config = config.get("app", {}).get("logging", {})
+log_config = config["app"]["logging"]
 setup_logger(
     log_dir=log_config.get("dir", "logs"),
-    level=log_config.get("level", "INFO")
+    level=log_config.get("level", "INFO"),
+    rotation=log_config.get("rotation", "100 MB"),
+    retention=log_config.get("retention", "7 days")
 )
 
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    """应用生命周期管理"""
-    # 启动时初始化
-    logger.info("初始化视频处理器...")
+async def _init_processor(app_config: Mapping):
+    """创建视频处理器及其依赖的各组件
 
-    app_config = config.get("app", {})
+    处理模块在这里才导入，导入 src.server.main 时不加载 httpx 等依赖，
+    缩短服务启动时间。
 
-    # 初始化各组件
-    filesystem_config = app_config.get("filesystem", {})
+    Args:
+        app_config: 应用配置（config["app"]）
+
+    Returns:
+        视频处理器
+    """
+    from src.processor.filesystem_client import FileSystemClient
+    from src.processor.asr_client import AliyunASRClient
+    from src.processor.status_manager import StatusManager
+    from src.processor.video_processor import VideoProcessor
+
+    filesystem_config = app_config["filesystem"]
     filesystem_client = FileSystemClient(
         base_url=filesystem_config.get("base_url", ""),
         query_endpoint=filesystem_config.get("query_endpoint", "/api/videos/query"),
         download_endpoint_template=filesystem_config.get("download_endpoint_template", "/api/videos/{id}/download"),
         timeout=filesystem_config.get("timeout", 300),
-        cache_ttl=filesystem_config.get("cache_ttl", 30)
+        connect_timeout=filesystem_config.get("connect_timeout", 2.0),
+        query_timeout=filesystem_config.get("query_timeout", 30.0),
+        metadata_timeout=filesystem_config.get("metadata_timeout", 10.0),
+        cache_ttl=filesystem_config.get("cache_ttl", 30),
+        metadata_cache_ttl=filesystem_config.get("metadata_cache_ttl", 60)
     )
 
-    asr_config = app_config.get("asr", {})
+    asr_config = app_config["asr"]
     asr_client = AliyunASRClient(
         api_key=os.getenv(asr_config.get("access_key", ""), ""),
-        model=asr_config.get("model", "fun-asr")
+        model=asr_config.get("model", "fun-asr"),
+        max_rps=asr_config.get("max_rps", 10),
+        timeout=asr_config.get("timeout", 30.0),
+        task_timeout=asr_config.get("task_timeout", 300),
+        file_timeout=asr_config.get("file_timeout", 30)
     )
 
-    files_config = app_config.get("files", {})
-    status_manager = StatusManager(
+    # 状态文件可能较大，在线程中加载，不阻塞事件循环
+    files_config = app_config["files"]
+    status_manager = await asyncio.to_thread(
+        StatusManager,
         status_file=files_config.get("status_file", "data/status.json")
     )
 
-    video_processor = VideoProcessor(
+    processor_config = app_config["processor"]
+    return VideoProcessor(
         filesystem_client=filesystem_client,
         asr_client=asr_client,
         status_manager=status_manager,
-        output_dir=files_config.get("output_dir", "data/output")
+        output_dir=files_config.get("output_dir", "data/output"),
+        max_concurrency=processor_config.get("max_concurrency", 8),
+        asr_batch_size=processor_config.get("asr_batch_size", 32),
+        result_cache_size=processor_config.get("result_cache_size", 256),
+        summary_cache_size=processor_config.get("summary_cache_size", 10000),
+        write_batch_size=processor_config.get("write_batch_size", 64)
     )
 
+
+async def _deferred_init(app: FastAPI):
+    """后台初始化视频处理器，完成后标记服务就绪"""
+    logger.info("初始化视频处理器...")
+
+    try:
+        video_processor = await _init_processor(config["app"])
+    except Exception as e:
+        # 记录失败原因，/health/ready 返回 503 并附带错误信息；
+        # 是否退出进程由启动方（main.py）决定
+        logger.error(f"视频处理器初始化失败: {e}")
+        app.state.init_error = e
+        return
+
     # 设置到全局
     set_processor(video_processor)
     app.state.processor = video_processor
+    app.state.ready = True
 
     logger.info("视频处理器初始化完成")
 
-    yield
 
-    # 关闭时清理
-    logger.info("清理资源...")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """应用生命周期管理
 
+    组件初始化放到后台任务中，端口绑定后即可响应 /health/live，
+    初始化完成前 /health/ready 和依赖处理器的接口返回 503。
+    """
+    app.state.processor = None
+    app.state.ready = False
+    app.state.init_error = None
+    init_task = app.state.init_task = asyncio.create_task(_deferred_init(app))
 
-# 创建 FastAPI 应用
-server_config = config.get("app", {}).get("server", {})
-app = FastAPI(
-    title="douyin-processor",
-    version="1.0.0",
-    lifespan=lifespan
-)
+    yield
 
-# CORS 中间件
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+    # 关闭时清理
+    logger.info("清理资源...")
+    init_task.cancel()
+    try:
+        await init_task
+    except asyncio.CancelledError:
+        pass
+
+    video_processor = app.state.processor
+    if video_processor is None:
+        return
+
+    set_processor(None)
+    await video_processor.close()
+    await video_processor.filesystem_client.aclose()
+    await video_processor.asr_client.aclose()
+    await video_processor.status_manager.close()
+
+
+def create_app() -> FastAPI:
+    """创建 FastAPI 应用
+
+    Returns:
+        FastAPI 应用
+    """
+    # 生产环境不提供 OpenAPI 文档，启动时不生成接口 schema
+    prod = server_config.get("prod", False)
+    app = FastAPI(
+        title="douyin-processor",
+        version="1.0.0",
+        lifespan=lifespan,
+        openapi_url=None if prod else "/openapi.json",
+        docs_url=None if prod else "/docs",
+        redoc_url=None
+    )
 
-# 注册路由
-app.include_router(router)
+    # CORS 中间件（默认关闭，开启时使用配置中明确列出的来源/方法/请求头）
+    cors_config = server_config.get("cors", {})
+    if cors_config.get("enabled", False):
+        app.add_middleware(
+            CORSMiddleware,
+            allow_origins=cors_config.get("allow_origins", []),
+            allow_credentials=cors_config.get("allow_credentials", False),
+            allow_methods=cors_config.get("allow_methods", ["GET", "POST", "DELETE"]),
+            allow_headers=cors_config.get("allow_headers", ["Content-Type"]),
+        )
+
+    # 注册路由
+    app.include_router(router)
+
+    @app.get("/")
+    async def root():
+        """根路径"""
+        return {
+            "service": "douyin-processor",
+            "version": "1.0.0",
+            "docs": app.docs_url,
+            "health": "/health"
+        }
+
+    return app
 
 
-@app.get("/")
-async def root():
-    """根路径"""
-    return {
-        "service": "douyin-processor",
-        "version": "1.0.0",
-        "docs": "/docs",
-        "health": "/health"
-    }
+# 创建 FastAPI 应用
+server_config = config["app"]["server"]
+app = create_app()
 
 
 if __name__ == "__main__":
@@ -116,9 +200,11 @@ if __name__ == "__main__":
     host = server_config.get("host", "0.0.0.0")
     port = server_config.get("port", 8093)
 
+    # 访问日志每个请求都要格式化并输出一行，高并发下明显降低吞吐，默认关闭
     uvicorn.run(
         "src.server.main:app",
         host=host,
         port=port,
-        log_level="info"
+        log_level=server_config.get("log_level", "info"),
+        access_log=server_config.get("access_log", False)
     )
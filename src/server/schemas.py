@@ -0,0 +1,99 @@
+"""
+API 请求/响应模型
+"""
+
+from pydantic import BaseModel, ConfigDict
+from typing import Optional, List
+
+
+class _Schema(BaseModel):
+    """模型基类：首次使用时才构建校验器，缩短启动时间"""
+    model_config = ConfigDict(defer_build=True)
+
+
+class ProcessResponse(_Schema):
+    """处理响应"""
+    success: bool
+    message: str
+    data: Optional[dict] = None
+
+
+class ResultResponse(_Schema):
+    """结果响应"""
+    success: bool
+    data: Optional[dict] = None
+
+
+class TaskResponse(_Schema):
+    """任务响应"""
+    success: bool
+    message: str
+    data: Optional[dict] = None
+
+
+class TranscriptInfo(_Schema):
+    """转写信息"""
+    text: str
+    segments: Optional[List[dict]] = None
+    confidence: float
+    audio_duration: float
+
+
+class VideoListItem(_Schema):
+    """视频列表项"""
+    aweme_id: str
+    status: str
+    title: str
+    author: str
+    audio_url: str
+    transcript: Optional[TranscriptInfo] = None
+    seg_count: Optional[int] = None
+    processed_at: Optional[int] = None
+    upload_time: Optional[str] = None
+    is_read: bool = False
+    read_at: Optional[int] = None
+
+
+class VideoListResponse(_Schema):
+    """视频列表响应"""
+    total_count: int
+    videos: List[VideoListItem]
+    page: int
+    page_size: int
+
+
+class VideoDetailResponse(_Schema):
+    """视频详情响应"""
+    aweme_id: str
+    status: str
+    title: str
+    author: str
+    description: str
+    audio_url: str
+    transcript: Optional[TranscriptInfo] = None
+    processed_at: Optional[int] = None
+    upload_time: Optional[str] = None
+    error: Optional[str] = None
+    is_read: bool = False
+    read_at: Optional[int] = None
+
+
+class StatsResponse(_Schema):
+    """统计信息响应"""
+    total: int
+    completed: int
+    processing: int
+    failed: int
+    pending: int
+    success_rate: float
+
+
+class MarkReadRequest(_Schema):
+    """标记已读请求"""
+    is_read: bool
+
+
+class ActionResponse(_Schema):
+    """操作响应"""
+    success: bool
+    message: str
@@ -3,17 +3,41 @@
 提供日志、配置、文件操作等工具函数
 """
 
+import copy
+import functools
+import mmap
 import os
-import json
+import sys
+import threading
 from pathlib import Path
-from typing import Any, Optional
+from types import MappingProxyType
+from typing import Any, Mapping, Optional
 from loguru import logger
+import orjson
+
+# 控制台日志格式（着色 / 不着色）
+_CONSOLE_FORMAT = "<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <level>{message}</level>"
+_CONSOLE_FORMAT_PLAIN = "{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {message}"
+
+# setup_logger 当前生效的参数（日志目录、级别、轮转、保留）
+_LOGGER_CONFIG: Optional[tuple] = None
+
+# freeze_config 保证存在的 app 配置分组
+_CONFIG_SECTIONS = ("server", "filesystem", "files", "asr", "processor", "logging")
+
+# ensure_dir 已确认存在的目录
+_ENSURED_DIRS: set[str] = set()
+
+# format_size 使用的大小单位
+_SIZE_UNITS = ("B", "KB", "MB", "GB", "TB")
 
 
 def setup_logger(
     name: str = "douyin-processor",
     log_dir: str = "logs",
-    level: str = "INFO"
+    level: str = "INFO",
+    rotation: str = "100 MB",
+    retention: str = "7 days"
 ) -> None:
     """配置日志器
 
@@ -21,80 +45,182 @@ def setup_logger(
         name: 日志器名称
         log_dir: 日志目录
         level: 日志级别
+        rotation: 日志文件轮转条件（如 "100 MB"、"00:00"）
+        retention: 日志文件保留时长（如 "7 days"）
     """
+    # 以相同参数重复调用时保留现有处理器，不重新打开日志文件
+    global _LOGGER_CONFIG
+    logger_config = (log_dir, level, rotation, retention)
+    if logger_config == _LOGGER_CONFIG:
+        return
+
     # 移除默认处理器
     logger.remove()
 
     # 创建日志目录
     log_path = Path(log_dir)
-    log_path.mkdir(parents=True, exist_ok=True)
+    ensure_dir(log_dir)
 
-    # 控制台输出
+    # 控制台输出（enqueue：由后台线程写出，不阻塞事件循环）
+    # 非终端（如容器日志）不着色，使用不带颜色标签的格式
+    colorize = sys.stderr.isatty()
     logger.add(
-        sink=lambda msg: print(msg, end=""),
-        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <level>{message}</level>",
+        sink=sys.stderr,
+        format=_CONSOLE_FORMAT if colorize else _CONSOLE_FORMAT_PLAIN,
         level=level,
-        colorize=True,
+        colorize=colorize,
+        enqueue=True,
     )
 
-    # 文件输出
+    # 文件输出（enqueue：由后台线程批量写盘，请求处理不等待磁盘 I/O）
     logger.add(
         sink=log_path / "{time:YYYY-MM-DD}.log",
         format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} | {message}",
         level=level,
-        rotation="100 MB",
-        retention="7 days",
+        rotation=rotation,
+        retention=retention,
         encoding="utf-8",
+        colorize=False,
+        enqueue=True,
     )
 
+    _LOGGER_CONFIG = logger_config
+
 
 def load_config(config_path: str) -> dict:
     """加载配置文件
 
+    同一进程内重复加载且配置文件的修改时间和大小未变化时，
+    直接复用内存中的解析结果。
+
     Args:
         config_path: 配置文件路径
 
     Returns:
-        配置字典
+        配置字典（副本，可自由修改）
 
     Raises:
         FileNotFoundError: 配置文件不存在
         yaml.YAMLError: YAML格式错误
     """
-    import yaml
-
     config_file = Path(config_path)
 
-    if not config_file.exists():
-        raise FileNotFoundError(f"配置文件不存在: {config_path}")
+    try:
+        stat = config_file.stat()
+    except FileNotFoundError:
+        raise FileNotFoundError(f"配置文件不存在: {config_path}") from None
+
+    config = _parse_config(
+        str(config_file.resolve()), stat.st_mtime_ns, stat.st_size
+    )
+    return copy.deepcopy(config)
+
 
-    with open(config_file, "r", encoding="utf-8") as f:
-        config = yaml.safe_load(f)
+@functools.lru_cache(maxsize=8)
+def _parse_config(config_path: str, mtime_ns: int, size: int) -> dict:
+    """解析配置文件（按路径、修改时间和大小缓存）
+
+    Args:
+        config_path: 配置文件绝对路径
+        mtime_ns: 配置文件修改时间（纳秒）
+        size: 配置文件大小
+
+    Returns:
+        配置字典（缓存共享，调用方不得修改）
+    """
+    import yaml
+
+    # 优先使用 libyaml 的 C 实现，未安装时回退到纯 Python 实现
+    try:
+        from yaml import CSafeLoader as Loader
+    except ImportError:
+        from yaml import SafeLoader as Loader
+
+    # 以二进制方式读取，由 YAML 解析器自行识别 UTF-8 编码
+    with open(config_path, "rb") as f:
+        config = yaml.load(f, Loader=Loader)
 
     return config if config else {}
 
 
+def freeze_config(config: dict) -> Mapping[str, Any]:
+    """补全配置分组并转换为只读映射
+
+    app 下缺失或为空的分组补为空映射，调用方可直接使用
+    config["app"]["logging"] 这类下标访问，不必层层 .get(..., {})。
+
+    Args:
+        config: load_config 返回的配置字典
+
+    Returns:
+        只读配置映射（各级字典均为 MappingProxyType）
+    """
+    app_config = dict(config.get("app") or {})
+    for section in _CONFIG_SECTIONS:
+        if not app_config.get(section):
+            app_config[section] = {}
+
+    return _freeze({**config, "app": app_config})
+
+
+def _freeze(value: Any) -> Any:
+    """递归地将字典转换为只读映射
+
+    Args:
+        value: 配置值
+
+    Returns:
+        字典转换为 MappingProxyType，其他值原样返回
+    """
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    return value
+
+
 def save_json(
     data: dict,
     filepath: str,
-    indent: int = 2,
+    indent: Optional[int] = 2,
     ensure_ascii: bool = False
 ) -> None:
     """保存JSON文件
 
+    使用 orjson 序列化，dataclass 对象可直接写入，非字符串键会被转换为字符串。
+    先写入同目录的临时文件再原子替换，读取方不会看到写了一半的文件。
+
     Args:
         data: 要保存的数据
         filepath: 文件路径
-        indent: 缩进空格数
-        ensure_ascii: 是否确保ASCII编码
+        indent: 缩进，非空时使用 2 空格缩进，None 表示紧凑格式
+        ensure_ascii: 保留参数，orjson 始终输出 UTF-8（等同 False）
     """
     file_path = Path(filepath)
 
     # 创建父目录
-    file_path.parent.mkdir(parents=True, exist_ok=True)
+    parent_dir = str(file_path.parent)
+    ensure_dir(parent_dir)
 
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=indent, ensure_ascii=ensure_ascii)
+    option = orjson.OPT_NON_STR_KEYS
+    if indent:
+        option |= orjson.OPT_INDENT_2
+    content = orjson.dumps(data, option=option)
+
+    # 临时文件名带上进程和线程 ID，多个写入方同时写同一文件时互不干扰
+    tmp_path = file_path.with_name(
+        f"{file_path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+    )
+    try:
+        try:
+            tmp_path.write_bytes(content)
+        except FileNotFoundError:
+            # 目录在记录为已创建后被删除，重新创建后重试
+            _ENSURED_DIRS.discard(parent_dir)
+            ensure_dir(parent_dir)
+            tmp_path.write_bytes(content)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
 
 
 def load_json(filepath: str) -> dict:
@@ -107,16 +233,37 @@ def load_json(filepath: str) -> dict:
         数据字典
 
     Raises:
-        FileNotFoundError: 文件不存在
-        json.JSONDecodeError: JSON格式错误
+        orjson.JSONDecodeError: JSON格式错误
     """
     file_path = Path(filepath)
 
     if not file_path.exists():
         return {}
 
-    with open(file_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = orjson.loads(file_path.read_bytes())
+
+    return data if data else {}
+
+
+def load_json_mmap(filepath: str) -> dict:
+    """通过内存映射加载JSON文件（适合较大的文件）
+
+    文件内容直接由页缓存映射给 orjson 解析，不再额外复制一份到内存。
+    文件不能为空。
+
+    Args:
+        filepath: 文件路径
+
+    Returns:
+        数据字典
+
+    Raises:
+        orjson.JSONDecodeError: JSON格式错误
+    """
+    with open(filepath, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            with memoryview(mm) as view:
+                data = orjson.loads(view)
 
     return data if data else {}
 
@@ -130,9 +277,8 @@ def format_duration(seconds: float) -> str:
     Returns:
         格式化后的时长字符串（如：1:23:45）
     """
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    secs = int(seconds % 60)
+    hours, remainder = divmod(int(seconds), 3600)
+    minutes, secs = divmod(remainder, 60)
 
     if hours > 0:
         return f"{hours}:{minutes:02d}:{secs:02d}"
@@ -149,21 +295,26 @@ def get_file_size(filepath: str) -> int:
     Returns:
         文件大小（字节）
     """
-    file_path = Path(filepath)
-
-    if not file_path.exists():
+    try:
+        return os.stat(filepath).st_size
+    except OSError:
         return 0
 
-    return file_path.stat().st_size
-
 
 def ensure_dir(dir_path: str) -> None:
     """确保目录存在
 
+    已确认存在的目录会被记录，之后对同一目录的调用不再访问文件系统。
+
     Args:
         dir_path: 目录路径
     """
-    Path(dir_path).mkdir(parents=True, exist_ok=True)
+    dir_path = os.fspath(dir_path)
+    if dir_path in _ENSURED_DIRS:
+        return
+
+    os.makedirs(dir_path, exist_ok=True)
+    _ENSURED_DIRS.add(dir_path)
 
 
 def delete_file(filepath: str) -> bool:
@@ -175,15 +326,10 @@ def delete_file(filepath: str) -> bool:
     Returns:
         是否成功删除
     """
-    file_path = Path(filepath)
-
-    if not file_path.exists():
-        return False
-
     try:
-        file_path.unlink()
+        os.unlink(filepath)
         return True
-    except Exception:
+    except OSError:
         return False
 
 
@@ -196,8 +342,9 @@ def format_size(size_bytes: int) -> str:
     Returns:
         格式化后的大小字符串（如：1.5 MB）
     """
-    for unit in ["B", "KB", "MB", "GB"]:
-        if size_bytes < 1024:
-            return f"{size_bytes:.1f} {unit}"
-        size_bytes /= 1024
-    return f"{size_bytes:.1f} TB"
+    if size_bytes < 1024:
+        return f"{size_bytes:.1f} B"
+
+    # 由二进制位数直接得到单位（每 10 位对应一级）
+    idx = min((int(size_bytes).bit_length() - 1) // 10, len(_SIZE_UNITS) - 1)
+    return f"{size_bytes / (1 << (idx * 10)):.1f} {_SIZE_UNITS[idx]}"